@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from social_media_api.metrics import registry
+        from .authentication import token_cache
+
+        for stat in ('hits', 'misses', 'size'):
+            registry.gauge(
+                f'auth_token_cache_{stat}',
+                f"Token authentication cache {stat}.",
+                lambda stat=stat: token_cache.stats()[stat],
+            )
@@ -0,0 +1,90 @@
+"""
+Token authentication with an in-process lookup cache.
+
+DRF's ``TokenAuthentication`` joins the token and user tables on every
+request. ``CachedTokenAuthentication`` remembers key -> (user, token) in a
+small TTL/LRU cache, so an active client costs no authentication query.
+Deleting a token or deactivating/deleting a user evicts the entry (see
+``accounts.signals``); changes made in another process are picked up when
+the entry expires after ``AUTH_TOKEN_CACHE_TTL`` seconds.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+
+class TokenCache:
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 60)
+
+    @property
+    def maxsize(self):
+        return getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 10000)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_user(self, user_id):
+        with self._lock:
+            stale = [key for key, (_, (user, _)) in self._entries.items() if user.pk == user_id]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            token_cache.set(key, cached)
+
+        user, token = cached
+        # Each request gets its own copy so per-request attribute changes
+        # never leak into the shared entry.
+        return copy.copy(user), token
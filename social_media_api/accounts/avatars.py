@@ -0,0 +1,125 @@
+"""
+Profile picture uploads and thumbnails.
+
+An upload is hashed and streamed chunk by chunk into storage under
+``avatars/<aa>/<sha256>/``. Identical pictures share one original and one
+set of thumbnails however many users upload them. Square JPEG thumbnails
+for every size in ``AVATAR_SIZES`` are rendered after the request commits,
+in a small thread pool, and ``User.avatar_digest`` is only switched over
+once they exist. Until then payloads keep showing the previous avatar. With
+``AVATAR_THUMBNAILS_ASYNC = False`` the thumbnails are rendered inline.
+"""
+import hashlib
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from posts.cache import invalidate_author_posts
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def avatar_sizes():
+    return tuple(_setting('AVATAR_SIZES', (48, 96, 256)))
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=_setting('AVATAR_WORKERS', 2),
+    thread_name_prefix='avatar-thumbnails',
+)
+
+
+def _directory(digest):
+    return f'avatars/{digest[:2]}/{digest}'
+
+
+def thumbnail_name(digest, size):
+    return f'{_directory(digest)}/{size}.jpg'
+
+
+def thumbnail_urls(user):
+    """``{"48": url, ...}`` for the user's current avatar, or None."""
+    if not user.avatar_digest:
+        return None
+    return {
+        str(size): default_storage.url(thumbnail_name(user.avatar_digest, size))
+        for size in avatar_sizes()
+    }
+
+
+def store_original(upload):
+    """Save a validated image upload under its content hash; returns ``(digest, name)``."""
+    sha256 = hashlib.sha256()
+    for chunk in upload.chunks():
+        sha256.update(chunk)
+    digest = sha256.hexdigest()
+
+    name = f'{_directory(digest)}/original.{upload.image.format.lower()}'
+    if not default_storage.exists(name):
+        upload.seek(0)
+        name = default_storage.save(name, upload)
+    return digest, name
+
+
+def generate_thumbnails(digest, name):
+    """Render whichever thumbnails of the stored original are missing."""
+    missing = [
+        size for size in avatar_sizes()
+        if not default_storage.exists(thumbnail_name(digest, size))
+    ]
+    if not missing:
+        return
+
+    with default_storage.open(name) as original:
+        image = Image.open(original)
+        # JPEGs can be decoded at a reduced scale, close to the largest size needed.
+        image.draft('RGB', (max(missing), max(missing)))
+        image = ImageOps.exif_transpose(image).convert('RGB')
+
+        for size in missing:
+            thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, 'JPEG', quality=85, optimize=True)
+            default_storage.save(thumbnail_name(digest, size), ContentFile(buffer.getvalue()))
+
+
+def activate_avatar(user_id, digest, name):
+    generate_thumbnails(digest, name)
+    # A newer upload may have replaced this one while it was rendering.
+    updated = get_user_model().objects.filter(pk=user_id, profile_picture=name).update(
+        avatar_digest=digest
+    )
+    if updated:
+        invalidate_author_posts(user_id)
+
+
+def _activate_in_worker(user_id, digest, name):
+    try:
+        activate_avatar(user_id, digest, name)
+    except Exception:
+        logger.exception("Could not render thumbnails for %s", name)
+    finally:
+        close_old_connections()
+
+
+def save_profile_picture(user, upload):
+    """Store a new picture for the user and schedule its thumbnails; returns the digest."""
+    digest, name = store_original(upload)
+    get_user_model().objects.filter(pk=user.pk).update(profile_picture=name)
+
+    if _setting('AVATAR_THUMBNAILS_ASYNC', True):
+        transaction.on_commit(lambda: _executor.submit(_activate_in_worker, user.pk, digest, name))
+    else:
+        transaction.on_commit(lambda: activate_avatar(user.pk, digest, name))
+    return digest
@@ -0,0 +1,133 @@
+"""
+Follow and unfollow writes.
+
+Both operations touch the ``User.followers`` through table directly so they
+know whether a row was really added or removed, and adjust the
+denormalized ``follower_count``/``following_count`` columns with ``F()``
+updates in the same transaction. They then send the ``m2m_changed`` signal
+``user.following.add()``/``remove()`` would have sent, so cache
+invalidation keeps working unchanged.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.signals import m2m_changed
+
+from .models import User
+
+Follow = User.followers.through
+
+
+def _adjust_counts(user, targets, delta):
+    User.objects.filter(pk=user.pk).update(following_count=F('following_count') + delta * len(targets))
+    User.objects.filter(pk__in=targets).update(follower_count=F('follower_count') + delta)
+
+
+def _send_changed(action, user, target_ids):
+    m2m_changed.send(
+        sender=Follow,
+        instance=user,
+        action=action,
+        reverse=True,
+        model=User,
+        pk_set=set(target_ids),
+        using=Follow.objects.db,
+    )
+
+
+@transaction.atomic
+def follow(user, target):
+    """Make ``user`` follow ``target``; returns False if they already did."""
+    _, created = Follow.objects.get_or_create(from_user_id=target.pk, to_user_id=user.pk)
+    if created:
+        _adjust_counts(user, [target.pk], 1)
+        _send_changed('post_add', user, [target.pk])
+    return created
+
+
+@transaction.atomic
+def unfollow(user, target):
+    """Make ``user`` stop following ``target``; returns False if they did not."""
+    deleted, _ = Follow.objects.filter(from_user_id=target.pk, to_user_id=user.pk).delete()
+    if deleted:
+        _adjust_counts(user, [target.pk], -1)
+        _send_changed('post_remove', user, [target.pk])
+    return bool(deleted)
+
+
+@transaction.atomic
+def follow_many(user, target_ids):
+    """
+    Make ``user`` follow every existing user in ``target_ids``.
+
+    Returns ``(followed, missing)``: the ids newly followed and the ids that
+    do not exist. Ids already followed are in neither.
+    """
+    target_ids = set(target_ids) - {user.pk}
+    # Serialize concurrent bulk follows by the same user so counts stay exact.
+    User.objects.select_for_update().filter(pk=user.pk).exists()
+
+    existing = set(User.objects.filter(pk__in=target_ids).values_list('pk', flat=True))
+    already = set(
+        Follow.objects.filter(to_user_id=user.pk, from_user_id__in=existing)
+        .values_list('from_user_id', flat=True)
+    )
+    followed = existing - already
+
+    Follow.objects.bulk_create(
+        [Follow(from_user_id=target_id, to_user_id=user.pk) for target_id in followed],
+        ignore_conflicts=True,
+    )
+    if followed:
+        _adjust_counts(user, followed, 1)
+        _send_changed('post_add', user, followed)
+
+    return followed, target_ids - existing
+
+
+@transaction.atomic
+def unfollow_many(user, target_ids):
+    """
+    Make ``user`` stop following every user in ``target_ids``.
+
+    Returns the ids that were unfollowed; ids not followed are skipped.
+    """
+    # Serialize with bulk follows by the same user so counts stay exact.
+    User.objects.select_for_update().filter(pk=user.pk).exists()
+
+    follows = Follow.objects.filter(to_user_id=user.pk, from_user_id__in=set(target_ids))
+    unfollowed = set(follows.values_list('from_user_id', flat=True))
+    if unfollowed:
+        Follow.objects.filter(to_user_id=user.pk, from_user_id__in=unfollowed).delete()
+        _adjust_counts(user, unfollowed, -1)
+        _send_changed('post_remove', user, unfollowed)
+
+    return unfollowed
+
+
+def suggestions_key(user_id):
+    return f'accounts:suggestions:{user_id}'
+
+
+def invalidate_suggestions(user_ids):
+    """Drop cached suggestions of users whose followees changed."""
+    if user_ids:
+        cache.delete_many([suggestions_key(user_id) for user_id in user_ids])
+
+
+def suggested_users(user, limit=20):
+    """
+    Friends of friends ranked by how many of the user's followees follow them.
+
+    One aggregate query: join each candidate's followers against the user's
+    followees, count the matches, and drop people already followed.
+    """
+    followees = Follow.objects.filter(to_user_id=user.pk).values('from_user_id')
+    return (
+        User.objects.filter(followers__in=followees)
+        .exclude(pk=user.pk)
+        .exclude(followers=user)
+        .only('id', 'username', 'follower_count')
+        .annotate(mutual_count=Count('followers'))
+        .order_by('-mutual_count', '-follower_count', 'pk')[:limit]
+    )
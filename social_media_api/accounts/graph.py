@@ -0,0 +1,102 @@
+"""
+Cached follow graph.
+
+Each user's following and follower ids are kept in the cache as sorted
+``array('q')`` values, loaded lazily from the ``User.followers`` through
+table and dropped by the ``m2m_changed`` handler in ``accounts.signals``.
+Mutual follows are a merge of the two sorted arrays, which does not touch
+the database once both are cached; the profile's mutuals count is served
+this way.
+
+Invalidation only reaches the cache of the process that made the change,
+so another worker can serve a stale array until it expires. That is fine
+for a displayed count, but writes that must act on the current graph,
+such as fan-out, backfill and follow checks, use the ``*_from_db``
+functions, which read the through table. Follower and following counts
+come from the denormalized ``User`` columns.
+"""
+from array import array
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+FOLLOWING = 'following'
+FOLLOWERS = 'followers'
+
+
+def _key(kind, user_id):
+    return f'graph:{kind}:{user_id}'
+
+
+def _timeout():
+    return getattr(settings, 'GRAPH_CACHE_TIMEOUT', 3600)
+
+
+def _query_ids(kind, user_id):
+    # A row (from_user=A, to_user=B) means B follows A.
+    follows = get_user_model().followers.through.objects
+    if kind == FOLLOWING:
+        rows = follows.filter(to_user_id=user_id).values_list('from_user_id', flat=True)
+    else:
+        rows = follows.filter(from_user_id=user_id).values_list('to_user_id', flat=True)
+    return array('q', sorted(rows))
+
+
+def _ids(kind, user_id):
+    ids = cache.get(_key(kind, user_id))
+    if ids is None:
+        ids = _query_ids(kind, user_id)
+        cache.set(_key(kind, user_id), ids, timeout=_timeout())
+    return ids
+
+
+def following_ids(user_id):
+    """Sorted ids of the users ``user_id`` follows."""
+    return _ids(FOLLOWING, user_id)
+
+
+def follower_ids(user_id):
+    """Sorted ids of the users following ``user_id``."""
+    return _ids(FOLLOWERS, user_id)
+
+
+def follower_ids_from_db(user_id):
+    """``follower_ids`` read from the through table, bypassing the cache."""
+    return _query_ids(FOLLOWERS, user_id)
+
+
+def following_ids_from_db(user_id):
+    """``following_ids`` read from the through table, bypassing the cache."""
+    return _query_ids(FOLLOWING, user_id)
+
+
+def is_following_from_db(user_id, other_id):
+    follows = get_user_model().followers.through.objects
+    return follows.filter(to_user_id=user_id, from_user_id=other_id).exists()
+
+
+def mutual_ids(user_id):
+    """Users that ``user_id`` follows and who follow back, in id order."""
+    following = following_ids(user_id)
+    followers = follower_ids(user_id)
+    mutuals = []
+    i = j = 0
+    while i < len(following) and j < len(followers):
+        if following[i] == followers[j]:
+            mutuals.append(following[i])
+            i += 1
+            j += 1
+        elif following[i] < followers[j]:
+            i += 1
+        else:
+            j += 1
+    return mutuals
+
+
+def invalidate(follower_ids_changed=(), followed_ids_changed=()):
+    """Drop cached arrays after follows between these users were added or removed."""
+    keys = [_key(FOLLOWING, user_id) for user_id in follower_ids_changed]
+    keys += [_key(FOLLOWERS, user_id) for user_id in followed_ids_changed]
+    if keys:
+        cache.delete_many(keys)
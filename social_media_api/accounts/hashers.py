@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 with its work factor taken from ``PASSWORD_HASH_ITERATIONS``.
+
+    It keeps the ``pbkdf2_sha256`` algorithm name, so existing hashes still
+    verify. Django re-hashes a password on the next successful login whenever
+    the stored iteration count, or the preferred hasher, no longer matches
+    the settings.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASH_ITERATIONS', PBKDF2PasswordHasher.iterations)
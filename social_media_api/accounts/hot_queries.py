@@ -0,0 +1,23 @@
+"""Querysets behind authentication and the follow graph; see ``social_media_api.explain``."""
+from rest_framework.authtoken.models import Token
+
+from social_media_api.explain import hot_query
+
+from .models import User
+
+Follow = User.followers.through
+
+
+@hot_query('accounts.token_lookup')
+def token_lookup():
+    return Token.objects.select_related('user').filter(key='0' * 40)
+
+
+@hot_query('accounts.following_ids')
+def following_ids():
+    return Follow.objects.filter(to_user_id=1).values_list('from_user_id', flat=True)
+
+
+@hot_query('accounts.follower_ids')
+def follower_ids():
+    return Follow.objects.filter(from_user_id=1).values_list('to_user_id', flat=True)
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:09
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    Post = apps.get_model('posts', 'Post')
+    Follow = User.followers.through
+
+    def count_of(queryset, column):
+        rows = (
+            queryset.filter(**{column: OuterRef('pk')})
+            .order_by()
+            .values(column)
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+    User.objects.update(
+        follower_count=count_of(Follow.objects.all(), 'from_user'),
+        following_count=count_of(Follow.objects.all(), 'to_user'),
+        post_count=count_of(Post.objects.all(), 'author'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('posts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='follower_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
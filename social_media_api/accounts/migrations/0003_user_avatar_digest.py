@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='avatar_digest',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
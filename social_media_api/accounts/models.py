@@ -5,12 +5,20 @@ from django.db import models
 class User(AbstractUser):
     bio = models.TextField(blank=True, null=True)
     profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True)
+    # Content hash of the current picture, set once its thumbnails exist
+    # (see accounts.avatars).
+    avatar_digest = models.CharField(max_length=64, blank=True, default='')
     followers = models.ManyToManyField(
         "self",
         symmetrical=False,
         related_name="following",
         blank=True
     )
+    # Denormalized counters, adjusted with F() updates by accounts.follows and
+    # the post views so profiles never need COUNT queries.
+    follower_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    post_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.username
\ No newline at end of file
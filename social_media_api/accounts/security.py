@@ -0,0 +1,97 @@
+"""
+Password hashing in a bounded thread pool.
+
+Hashing is deliberately slow, so a burst of registrations or a credential
+stuffing run can occupy every worker. All hashing for register/login goes
+through a bounded thread pool: at most ``PASSWORD_HASH_WORKERS`` hashes run
+at once, ``PASSWORD_HASH_QUEUE`` more may wait up to
+``PASSWORD_HASH_WAIT`` seconds for a slot, and anything beyond that is
+rejected with 503 instead of piling up. Database access stays on the
+request thread; the pool only runs pure hashing.
+
+Logins reach the pool through ``PooledModelBackend``, listed in
+``AUTHENTICATION_BACKENDS``, so ``django.contrib.auth.authenticate()``
+keeps consulting every configured backend and sending
+``user_login_failed``.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+from rest_framework import exceptions
+
+
+class HashingBusy(exceptions.APIException):
+    status_code = 503
+    default_detail = "Authentication is temporarily busy, please retry shortly."
+    default_code = 'hashing_busy'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=_setting('PASSWORD_HASH_WORKERS', 4),
+    thread_name_prefix='password-hash',
+)
+_slots = threading.BoundedSemaphore(
+    _setting('PASSWORD_HASH_WORKERS', 4) + _setting('PASSWORD_HASH_QUEUE', 16)
+)
+
+
+def run_hashing(func, *args):
+    """Run ``func(*args)`` in the hashing pool, or raise ``HashingBusy``."""
+    if not _slots.acquire(timeout=_setting('PASSWORD_HASH_WAIT', 2)):
+        raise HashingBusy()
+    try:
+        return _executor.submit(func, *args).result()
+    finally:
+        _slots.release()
+
+
+def hash_password(raw_password):
+    return run_hashing(make_password, raw_password)
+
+
+def _check(raw_password, encoded):
+    """Verify, and return a re-hash when the settings call for an upgrade."""
+    upgraded = []
+    is_correct = check_password(
+        raw_password, encoded, setter=lambda raw: upgraded.append(make_password(raw))
+    )
+    return is_correct, upgraded[0] if upgraded else None
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ``ModelBackend`` with the hashing moved into the pool.
+
+    Unknown usernames still pay for one hash so response timing does not
+    reveal which accounts exist.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            hash_password(password)
+            return None
+
+        is_correct, upgraded = run_hashing(_check, password, user.password)
+        if not is_correct or not self.user_can_authenticate(user):
+            return None
+
+        if upgraded:
+            user.password = upgraded
+            user.save(update_fields=['password'])
+        return user
@@ -1,8 +1,11 @@
 
+from django.conf import settings
 from django.contrib.auth import authenticate, get_user_model
 from rest_framework import serializers
 from rest_framework.authtoken.models import Token
 
+from .avatars import thumbnail_urls
+
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
 
@@ -37,4 +40,60 @@ class LoginSerializer(serializers.Serializer):
 
         return {
             "token": token.key
-        }
\ No newline at end of file
+        }
+
+
+class AvatarField(serializers.Field):
+    """A user's avatar thumbnail URLs keyed by size, or None."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, user):
+        return thumbnail_urls(user)
+
+
+class ProfilePictureSerializer(serializers.Serializer):
+    picture = serializers.ImageField()
+
+    def validate_picture(self, picture):
+        max_size = getattr(settings, 'AVATAR_MAX_UPLOAD_SIZE', 5 * 1024 * 1024)
+        if picture.size > max_size:
+            raise serializers.ValidationError(f"Pictures may be at most {max_size} bytes.")
+        return picture
+
+
+class PublicProfileSerializer(serializers.ModelSerializer):
+    avatar = AvatarField(source='*')
+
+    class Meta:
+        model = get_user_model()
+        fields = [
+            'id',
+            'username',
+            'bio',
+            'profile_picture',
+            'avatar',
+            'date_joined',
+            'follower_count',
+            'following_count',
+            'post_count'
+        ]
+        read_only_fields = fields
+
+
+class BulkFollowSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=2 ** 63 - 1),
+        allow_empty=False,
+        max_length=100
+    )
+
+
+class SuggestedUserSerializer(serializers.ModelSerializer):
+    mutual_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = get_user_model()
+        fields = ['id', 'username', 'follower_count', 'mutual_count']
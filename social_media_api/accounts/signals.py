@@ -0,0 +1,49 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import graph
+from .authentication import token_cache
+from .follows import invalidate_suggestions
+from .models import User
+
+
+@receiver(m2m_changed, sender=User.followers.through)
+def invalidate_follow_graph(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # pk_set is not provided for clear(), so capture the other side first.
+        related = instance.following if reverse else instance.followers
+        pk_set = set(related.values_list('id', flat=True))
+    elif action not in ('post_add', 'post_remove'):
+        return
+
+    if reverse:
+        # instance.following changed: instance follows/unfollows pk_set.
+        followers, followed = [instance.pk], list(pk_set)
+    else:
+        # instance.followers changed: pk_set follow/unfollow instance.
+        followers, followed = list(pk_set), [instance.pk]
+
+    def invalidate():
+        graph.invalidate(followers, followed)
+        # Suggestions exclude people already followed.
+        invalidate_suggestions(followers)
+
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=User)
+def evict_deactivated_user(sender, instance, **kwargs):
+    if not instance.is_active:
+        token_cache.delete_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def evict_deleted_user(sender, instance, **kwargs):
+    token_cache.delete_user(instance.pk)
@@ -1,3 +1,481 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+from rest_framework import status
+
+from social_media_api.testing import LOCMEM_CACHE, QueryBudgetTestCase, SocialAPITestCase
+
+from posts.models import FeedItem, Post
+
+from . import graph, security
+from .authentication import token_cache
+from .throttling import LoginUsernameThrottle
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class FollowGraphTestCase(SocialAPITestCase):
+    """
+    Tests for the cached follow graph and its m2m_changed invalidation.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.alice = self.make_user("alice")
+        self.bob = self.make_user("bob")
+        self.carol = self.make_user("carol")
+
+    def follow(self, user, target):
+        with self.captureOnCommitCallbacks(execute=True):
+            user.following.add(target)
+
+    def test_mutuals_are_cached(self):
+        self.follow(self.alice, self.bob)
+        self.follow(self.bob, self.alice)
+        self.follow(self.alice, self.carol)
+
+        graph.following_ids(self.alice.id)
+        graph.follower_ids(self.alice.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(graph.mutual_ids(self.alice.id), [self.bob.id])
+            self.assertEqual(list(graph.following_ids(self.alice.id)), [self.bob.id, self.carol.id])
+
+    def test_follow_changes_invalidate_both_sides(self):
+        self.assertEqual(list(graph.follower_ids(self.bob.id)), [])
+        self.assertEqual(list(graph.following_ids(self.alice.id)), [])
+
+        self.follow(self.alice, self.bob)
+        self.assertEqual(list(graph.follower_ids(self.bob.id)), [self.alice.id])
+        self.assertEqual(list(graph.following_ids(self.alice.id)), [self.bob.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bob.followers.clear()
+        self.assertEqual(list(graph.following_ids(self.alice.id)), [])
+
+    def test_follow_view_reports_follow_back(self):
+        self.follow(self.bob, self.alice)
+        self.authenticate(self.alice)
+
+        response = self.client.post(f"/api/accounts/follow/{self.bob.id}/")
+        self.assertTrue(response.data["follows_you"])
+
+    def test_follows_refresh_cached_suggestions(self):
+        self.follow(self.alice, self.bob)
+        self.follow(self.bob, self.carol)
+        self.authenticate(self.alice)
+        self.assertEqual([user["id"] for user in self.client.get("/api/accounts/suggestions/").data],
+                         [self.carol.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/accounts/follow/{self.carol.id}/")
+        self.assertEqual(self.client.get("/api/accounts/suggestions/").data, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/accounts/unfollow/{self.carol.id}/")
+        self.assertEqual(len(self.client.get("/api/accounts/suggestions/").data), 1)
+
+    def test_writes_ignore_a_stale_cache(self):
+        # Warm the cache, then change the graph the way another worker would:
+        # the row changes but this process's cached arrays are not dropped.
+        graph.follower_ids(self.alice.id)
+        graph.following_ids(self.bob.id)
+        self.alice.followers.through.objects.create(from_user_id=self.alice.id, to_user_id=self.bob.id)
+
+        self.authenticate(self.alice)
+        self.client.post("/api/posts/", {"title": "Fresh", "content": "Fan me out"})
+        self.assertEqual(FeedItem.objects.filter(owner=self.bob).count(), 1)
+
+        self.authenticate(self.bob)
+        response = self.client.post(f"/api/accounts/follow/{self.alice.id}/")
+        self.assertEqual(response.data["message"], "You already follow this user.")
+
+
+class ProfileCounterTestCase(SocialAPITestCase):
+    """
+    Tests for the denormalized follower, following and post counters.
+    """
+
+    def setUp(self):
+        self.alice = self.make_user("alice")
+        self.bob = self.make_user("bob")
+        self.authenticate(self.alice)
+
+    def test_follow_counters_ignore_repeats(self):
+        for _ in range(2):
+            self.client.post(f"/api/accounts/follow/{self.bob.id}/")
+
+        self.bob.refresh_from_db()
+        self.alice.refresh_from_db()
+        self.assertEqual((self.alice.following_count, self.bob.follower_count), (1, 1))
+
+        for _ in range(2):
+            self.client.post(f"/api/accounts/unfollow/{self.bob.id}/")
+
+        self.bob.refresh_from_db()
+        self.alice.refresh_from_db()
+        self.assertEqual((self.alice.following_count, self.bob.follower_count), (0, 0))
+
+    def test_public_profile_is_one_query(self):
+        self.client.post("/api/posts/", {"title": "Hi", "content": "there"})
+        self.authenticate(self.bob)
+        self.client.post(f"/api/accounts/follow/{self.alice.id}/")
+
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/accounts/users/{self.alice.id}/")
+
+        self.assertEqual(response.data["follower_count"], 1)
+        self.assertEqual(response.data["post_count"], 1)
+
+
+class BulkFollowTestCase(SocialAPITestCase):
+    """
+    Tests for bulk follow and unfollow and friends-of-friends suggestions.
+    """
+
+    def setUp(self):
+        self.user = self.make_user("newbie")
+        self.others = [self.make_user(f"user{number}") for number in range(3)]
+        self.authenticate(self.user)
+
+    def test_bulk_follow_skips_missing_and_existing(self):
+        self.client.post(f"/api/accounts/follow/{self.others[0].id}/")
+        ids = [other.id for other in self.others] + [9999]
+
+        response = self.client.post("/api/accounts/follow/bulk/", {"user_ids": ids}, format="json")
+
+        self.assertEqual(response.data["followed"], [self.others[1].id, self.others[2].id])
+        self.assertEqual(response.data["not_found"], [9999])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.following_count, 3)
+        self.assertEqual(self.user.following.count(), 3)
+
+    def test_bulk_follow_rejects_out_of_range_ids(self):
+        for user_id in (0, 2 ** 64):
+            response = self.client.post(
+                "/api/accounts/follow/bulk/", {"user_ids": [user_id]}, format="json"
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_unfollow_skips_users_not_followed(self):
+        author = self.others[0]
+        Post.objects.create(author=author, title="Followed", content="text")
+        self.client.post(
+            "/api/accounts/follow/bulk/", {"user_ids": [author.id, self.others[1].id]}, format="json"
+        )
+        ids = [other.id for other in self.others] + [9999]
+
+        response = self.client.post("/api/accounts/unfollow/bulk/", {"user_ids": ids}, format="json")
+
+        self.assertEqual(response.data["unfollowed"], [author.id, self.others[1].id])
+        self.user.refresh_from_db()
+        author.refresh_from_db()
+        self.assertEqual((self.user.following_count, author.follower_count), (0, 0))
+        self.assertFalse(FeedItem.objects.filter(owner=self.user).exists())
+
+    def test_suggestions_rank_friends_of_friends(self):
+        popular = self.make_user("popular")
+        niche = self.make_user("niche")
+        for other in self.others:
+            other.following.add(popular)
+        self.others[0].following.add(niche)
+        self.user.following.add(*self.others)
+
+        response = self.client.get("/api/accounts/suggestions/")
+
+        self.assertEqual(
+            [(s["username"], s["mutual_count"]) for s in response.data],
+            [("popular", 3), ("niche", 1)],
+        )
+
+
+@override_settings(AUTH_TOKEN_CACHE_TTL=60)
+class CachedTokenAuthenticationTestCase(SocialAPITestCase):
+    """
+    Tests for the token lookup cache and its invalidation.
+    """
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = self.make_user("cachedtoken")
+        self.authenticate(self.user)
+
+    def test_repeat_requests_skip_token_query(self):
+        self.client.get(f"/api/accounts/users/{self.user.id}/")
+
+        with self.assertNumQueries(1):
+            self.client.get(f"/api/accounts/users/{self.user.id}/")
+        self.assertEqual(token_cache.stats()["hits"], 1)
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get("/api/accounts/profile/")
+        self.user.auth_token.delete()
+
+        response = self.client.get("/api/accounts/profile/")
+        self.assertEqual(response.status_code, 401)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get("/api/accounts/profile/")
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get("/api/accounts/profile/")
+        self.assertEqual(response.status_code, 401)
+
+
+class LoginPipelineTestCase(SocialAPITestCase):
+    """
+    Tests for pooled password hashing, rehash-on-login and login throttling.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_register_then_login(self):
+        response = self.client.post(
+            "/api/accounts/register/",
+            {"username": "newcomer", "email": "new@example.com", "password": "s3cret-pass"},
+        )
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.post(
+            "/api/accounts/login/", {"username": "newcomer", "password": "s3cret-pass"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("token", response.data)
+
+    def test_login_rehashes_with_new_iteration_count(self):
+        user = self.make_user("veteran")
+        self.assertIn("$1000$", user.password)
+
+        with self.settings(PASSWORD_HASH_ITERATIONS=1200):
+            self.client.post("/api/accounts/login/", {"username": "veteran", "password": "testpassword"})
+
+        user.refresh_from_db()
+        self.assertIn("$1200$", user.password)
+
+    def test_login_goes_through_the_configured_backends(self):
+        self.make_user("plugged")
+        failures = []
+        user_login_failed.connect(lambda sender, **kwargs: failures.append(kwargs), weak=False,
+                                  dispatch_uid="test-login-failed")
+        self.addCleanup(user_login_failed.disconnect, dispatch_uid="test-login-failed")
+
+        response = self.client.post("/api/accounts/login/", {"username": "plugged", "password": "wrong"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(failures[0]["credentials"]["username"], "plugged")
+
+        # A backend that takes no passwords turns password logins off.
+        with self.settings(AUTHENTICATION_BACKENDS=["django.contrib.auth.backends.RemoteUserBackend"]):
+            response = self.client.post(
+                "/api/accounts/login/", {"username": "plugged", "password": "testpassword"}
+            )
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(CACHES=LOCMEM_CACHE)
+    def test_repeated_failures_for_one_account_are_throttled(self):
+        self.make_user("target")
+        statuses = [
+            self.client.post("/api/accounts/login/", {"username": "target", "password": "wrong"}).status_code
+            for _ in range(6)
+        ]
+        self.assertEqual(statuses, [400] * 5 + [429])
+
+    @override_settings(CACHES=LOCMEM_CACHE)
+    def test_concurrent_requests_cannot_overdraw_a_bucket(self):
+        cache.clear()
+        request = mock.Mock(data={"username": "contended"})
+        original_get = LocMemCache.get
+
+        def slow_get(backend, *args, **kwargs):
+            # Widen the window between reading and writing the bucket.
+            value = original_get(backend, *args, **kwargs)
+            time.sleep(0.01)
+            return value
+
+        results = []
+        start = threading.Barrier(10)
+
+        def attempt():
+            throttle = LoginUsernameThrottle()
+            start.wait()
+            results.append(throttle.allow_request(request, None))
+
+        # Patched on the class: each thread has its own backend instance.
+        with mock.patch.object(LocMemCache, "get", slow_get):
+            threads = [threading.Thread(target=attempt) for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(results.count(True), 5)
+
+    def test_saturated_hashing_pool_returns_503(self):
+        self.make_user("busy")
+        with mock.patch.object(security._slots, "acquire", return_value=False):
+            response = self.client.post("/api/accounts/login/", {"username": "busy", "password": "testpassword"})
+        self.assertEqual(response.status_code, 503)
+
+
+class ProfilePictureTestCase(SocialAPITestCase):
+    """
+    Tests for profile picture uploads, content-addressed storage and the
+    thumbnail URLs exposed in payloads.
+    """
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root, AVATAR_SIZES=(48, 96))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.media_root = media_root
+
+        self.user = self.make_user("pictured")
+        self.authenticate(self.user)
+
+    def image_upload(self, color="red", name="me.png"):
+        buffer = io.BytesIO()
+        Image.new("RGB", (300, 200), color).save(buffer, "PNG")
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+    def upload(self, user, **kwargs):
+        self.authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                "/api/accounts/profile/picture/", {"picture": self.image_upload(**kwargs)},
+                format="multipart"
+            )
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, names in os.walk(self.media_root) for name in names
+        )
+
+    def test_upload_renders_square_thumbnails(self):
+        response = self.upload(self.user)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        digest = response.data["avatar_digest"]
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.avatar_digest, digest)
+        with Image.open(os.path.join(self.media_root, f"avatars/{digest[:2]}/{digest}/96.jpg")) as thumb:
+            self.assertEqual(thumb.size, (96, 96))
+
+        avatar = self.client.get("/api/accounts/profile/").data["avatar"]
+        self.assertEqual(set(avatar), {"48", "96"})
+        self.assertTrue(avatar["48"].endswith(f"{digest}/48.jpg"))
+
+        Post.objects.create(author=self.user, title="Hi", content="x")
+        post = self.client.get("/api/posts/").data["results"][0]
+        self.assertEqual(post["author_avatar"], avatar)
+
+    @override_settings(CACHES=LOCMEM_CACHE)
+    def test_new_avatar_expires_cached_post_responses(self):
+        cache.clear()
+        post = Post.objects.create(author=self.user, title="Hi", content="x")
+        self.assertIsNone(self.client.get(f"/api/posts/{post.id}/").data["author_avatar"])
+        self.assertIsNone(self.client.get("/api/posts/").data["results"][0]["author_avatar"])
+
+        self.upload(self.user)
+        self.assertIsNotNone(self.client.get(f"/api/posts/{post.id}/").data["author_avatar"])
+        self.assertIsNotNone(self.client.get("/api/posts/").data["results"][0]["author_avatar"])
+
+    def test_identical_uploads_share_storage(self):
+        first = self.upload(self.user).data["avatar_digest"]
+        files = self.stored_files()
+
+        other = self.make_user("twin")
+        self.assertEqual(self.upload(other, name="copy.png").data["avatar_digest"], first)
+        self.assertEqual(self.stored_files(), files)
+        self.assertEqual(len(files), 3)
+
+    def test_non_images_are_rejected(self):
+        response = self.client.post(
+            "/api/accounts/profile/picture/",
+            {"picture": SimpleUploadedFile("x.png", b"not an image", content_type="image/png")},
+            format="multipart"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get("/api/accounts/profile/").data["avatar"], None)
+
+
+class AccountQueryBudgetTestCase(QueryBudgetTestCase):
+    """
+    Query budgets for every endpoint in ``accounts.urls``.
+    """
+
+    def test_register(self):
+        self.assertQueryBudget(3, lambda seeded: self.client.post("/api/accounts/register/", {
+            "username": f"new{seeded.authors[0].id}", "email": "new@example.com", "password": "pw12345!"
+        }))
+
+    def test_login(self):
+        self.assertQueryBudget(3, lambda seeded: self.client.post(
+            "/api/accounts/login/", {"username": "viewer", "password": "testpassword"}
+        ))
+
+    def test_profile(self):
+        self.assertQueryBudget(4, lambda seeded: self.client.get("/api/accounts/profile/"))
+
+    def test_public_profile(self):
+        self.assertQueryBudget(
+            2, lambda seeded: self.client.get(f"/api/accounts/users/{seeded.authors[0].id}/")
+        )
+
+    def make_targets(self, seeded):
+        self.targets = [self.make_user(f"target{author.id}") for author in seeded.authors]
+
+    def test_follow(self):
+        self.assertQueryBudget(
+            13, lambda seeded: self.client.post(f"/api/accounts/follow/{self.targets[0].id}/"),
+            prepare=self.make_targets
+        )
+
+    def test_bulk_follow(self):
+        self.assertQueryBudget(10, lambda seeded: self.client.post(
+            "/api/accounts/follow/bulk/",
+            {"user_ids": [user.id for user in self.targets]}, format="json"
+        ), prepare=self.make_targets)
+
+    def test_bulk_unfollow(self):
+        self.assertQueryBudget(9, lambda seeded: self.client.post(
+            "/api/accounts/unfollow/bulk/",
+            {"user_ids": [author.id for author in seeded.authors]}, format="json"
+        ))
+
+    def test_unfollow(self):
+        self.assertQueryBudget(
+            8, lambda seeded: self.client.post(f"/api/accounts/unfollow/{seeded.authors[0].id}/")
+        )
+
+    def test_suggestions(self):
+        self.assertQueryBudget(2, lambda seeded: self.client.get("/api/accounts/suggestions/"))
+
+    def test_profile_picture(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+
+        def request(seeded):
+            buffer = io.BytesIO()
+            Image.new("RGB", (64, 64), "blue").save(buffer, "PNG")
+            upload = SimpleUploadedFile("me.png", buffer.getvalue(), content_type="image/png")
+            with self.captureOnCommitCallbacks(execute=True):
+                return self.client.post(
+                    "/api/accounts/profile/picture/", {"picture": upload}, format="multipart"
+                )
+
+        # Activation also reads the author's post ids to expire their responses.
+        with override_settings(MEDIA_ROOT=media_root):
+            self.assertQueryBudget(6, request)
@@ -0,0 +1,88 @@
+"""
+Token-bucket throttles for the authentication endpoints.
+
+Rates come from ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']`` in DRF's
+``"<n>/<period>"`` form: a bucket holds ``n`` tokens and refills at ``n``
+per period, so clients get short bursts but a bounded sustained rate.
+Bucket state lives in the default cache and is shared between processes
+when that cache is. Updating a bucket reads and rewrites it, so each
+update holds a short lock taken with the cache's atomic ``add``. A request
+that cannot get the lock promptly is throttled: heavy contention on one
+bucket is exactly what the limit is for.
+"""
+import time
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+# A crashed lock holder cannot block its bucket for longer than this.
+LOCK_TIMEOUT = 1
+LOCK_ATTEMPTS = 25
+LOCK_RETRY_DELAY = 0.002
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        lock_key = f'{self.key}:lock'
+        if not self._acquire(lock_key):
+            self._wait = LOCK_TIMEOUT
+            return False
+        try:
+            return self._take_token()
+        finally:
+            self.cache.delete(lock_key)
+
+    def _acquire(self, lock_key):
+        for _ in range(LOCK_ATTEMPTS):
+            if self.cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+                return True
+            time.sleep(LOCK_RETRY_DELAY)
+        return False
+
+    def _take_token(self):
+        capacity, period = self.num_requests, self.duration
+        refill_rate = capacity / period
+        now = time.time()
+
+        tokens, updated = self.cache.get(self.key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill_rate)
+
+        if tokens < 1:
+            self._wait = (1 - tokens) / refill_rate
+            return False
+
+        self.cache.set(self.key, (tokens - 1, now), timeout=period)
+        return True
+
+    def wait(self):
+        return getattr(self, '_wait', None)
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginUsernameThrottle(TokenBucketThrottle):
+    """Limits attempts against one account however many IPs they come from."""
+    scope = 'login_username'
+
+    def get_cache_key(self, request, view):
+        username = request.data.get('username')
+        if not username:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': str(username).lower()}
+
+
+class RegisterIPThrottle(LoginIPThrottle):
+    scope = 'register_ip'
@@ -1,12 +1,18 @@
 
 from django.urls import path
 from .views import RegisterView, LoginView, ProfileView
-from .views import FollowUserView, UnfollowUserView
+from .views import FollowUserView, UnfollowUserView, PublicProfileView
+from .views import BulkFollowView, BulkUnfollowView, SuggestionsView, ProfilePictureView
 
 urlpatterns = [
     path('register/', RegisterView.as_view()),
     path('login/', LoginView.as_view()),
     path('profile/', ProfileView.as_view()),
+    path('profile/picture/', ProfilePictureView.as_view(), name='profile-picture'),
     path('follow/<int:user_id>/', FollowUserView.as_view()),
+    path('follow/bulk/', BulkFollowView.as_view(), name='follow-bulk'),
     path('unfollow/<int:user_id>/', UnfollowUserView.as_view()),
+    path('unfollow/bulk/', BulkUnfollowView.as_view(), name='unfollow-bulk'),
+    path('users/<int:user_id>/', PublicProfileView.as_view(), name='user-profile'),
+    path('suggestions/', SuggestionsView.as_view(), name='follow-suggestions'),
 ]
\ No newline at end of file
@@ -1,10 +1,22 @@
-from django.contrib.auth import get_user_model
+from django.contrib.auth import authenticate, get_user_model
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
-from django.contrib.auth import authenticate
+from django.conf import settings
+from django.core.cache import cache
+from posts.feed import backfill_feed, backfill_feed_from, prune_feed, prune_feed_from
+from notifications.dispatch import notify
+from . import graph
+from .follows import follow, follow_many, suggested_users, suggestions_key, unfollow, unfollow_many
+from .security import hash_password
+from .throttling import LoginIPThrottle, LoginUsernameThrottle, RegisterIPThrottle
+from .serializers import BulkFollowSerializer, PublicProfileSerializer, SuggestedUserSerializer
+from .serializers import ProfilePictureSerializer
+from .avatars import save_profile_picture, thumbnail_urls
+from rest_framework.parsers import MultiPartParser
+from django.db import transaction
 
 CustomUser = get_user_model()
 
@@ -14,16 +26,18 @@ CustomUser = get_user_model()
 class RegisterView(generics.GenericAPIView):
     queryset = CustomUser.objects.all()
     serializer_class = None  # if using serializer separately
+    throttle_classes = [RegisterIPThrottle]
 
     def post(self, request):
         username = request.data.get("username")
         email = request.data.get("email")
         password = request.data.get("password")
 
-        user = CustomUser.objects.create_user(
-            username=username,
-            email=email,
-            password=password
+        # Hash in the bounded pool, then store the already-hashed password.
+        user = CustomUser.objects.create(
+            username=CustomUser.normalize_username(username),
+            email=CustomUser.objects.normalize_email(email),
+            password=hash_password(password)
         )
 
         token = Token.objects.create(user=user)
@@ -35,12 +49,13 @@ class RegisterView(generics.GenericAPIView):
 
 class LoginView(generics.GenericAPIView):
     queryset = CustomUser.objects.all()
+    throttle_classes = [LoginIPThrottle, LoginUsernameThrottle]
 
     def post(self, request):
         username = request.data.get("username")
         password = request.data.get("password")
 
-        user = authenticate(username=username, password=password)
+        user = authenticate(request, username=username, password=password)
 
         if not user:
             return Response(
@@ -64,10 +79,62 @@ class FollowUserView(generics.GenericAPIView):
         if request.user == user_to_follow:
             return Response({"error": "You cannot follow yourself."}, status=400)
 
-        request.user.following.add(user_to_follow)
+        follows_back = graph.is_following_from_db(user_to_follow.id, request.user.id)
 
-        return Response({"message": "User followed successfully"})
+        if not follow(request.user, user_to_follow):
+            return Response({
+                "message": "You already follow this user.",
+                "follows_you": follows_back
+            })
 
+        backfill_feed(request.user, user_to_follow)
+        notify(user_to_follow.id, request.user, "started following you")
+
+        return Response({
+            "message": "User followed successfully",
+            "follows_you": follows_back
+        })
+
+
+
+
+class BulkFollowView(generics.GenericAPIView):
+    """Follow up to 100 users in one request with a single through-table insert."""
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = BulkFollowSerializer
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        followed, missing = follow_many(request.user, serializer.validated_data["user_ids"])
+
+        if followed:
+            backfill_feed_from(request.user, followed)
+            for user_id in followed:
+                notify(user_id, request.user, "started following you")
+
+        return Response({
+            "followed": sorted(followed),
+            "not_found": sorted(missing)
+        })
+
+
+class BulkUnfollowView(generics.GenericAPIView):
+    """Unfollow up to 100 users in one request with a single through-table delete."""
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = BulkFollowSerializer
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        unfollowed = unfollow_many(request.user, serializer.validated_data["user_ids"])
+
+        if unfollowed:
+            prune_feed_from(request.user, unfollowed)
+
+        return Response({"unfollowed": sorted(unfollowed)})
 
 
 class UnfollowUserView(generics.GenericAPIView):
@@ -77,7 +144,8 @@ class UnfollowUserView(generics.GenericAPIView):
     def post(self, request, user_id):
         user_to_unfollow = get_object_or_404(CustomUser.objects.all(), id=user_id)
 
-        request.user.following.remove(user_to_unfollow)
+        if unfollow(request.user, user_to_unfollow):
+            prune_feed(request.user, user_to_unfollow)
 
         return Response({"message": "User unfollowed successfully"})
     
@@ -86,8 +154,60 @@ class ProfileView(generics.GenericAPIView):
     queryset = CustomUser.objects.all()
 
     def get(self, request):
+        # request.user may come from the token cache; read counters fresh.
+        user = self.get_queryset().get(pk=request.user.pk)
+
         return Response({
-            "id": request.user.id,
-            "username": request.user.username,
-            "email": request.user.email,
-        })
\ No newline at end of file
+            "id": user.id,
+            "username": user.username,
+            "email": user.email,
+            "followers_count": user.follower_count,
+            "following_count": user.following_count,
+            "post_count": user.post_count,
+            "mutuals_count": len(graph.mutual_ids(user.id)),
+            "avatar": thumbnail_urls(user),
+        })
+
+
+class ProfilePictureView(generics.GenericAPIView):
+    """Upload a profile picture; thumbnails are rendered in the background."""
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ProfilePictureSerializer
+    parser_classes = [MultiPartParser]
+
+    @transaction.atomic
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        digest = save_profile_picture(request.user, serializer.validated_data['picture'])
+
+        return Response({"avatar_digest": digest}, status=status.HTTP_202_ACCEPTED)
+
+
+class PublicProfileView(generics.RetrieveAPIView):
+    """Anyone's profile with its counters, read in a single query."""
+    permission_classes = [permissions.IsAuthenticated]
+    queryset = CustomUser.objects.all()
+    serializer_class = PublicProfileSerializer
+    lookup_url_kwarg = 'user_id'
+
+
+class SuggestionsView(generics.GenericAPIView):
+    """People you may know, ranked by followees in common and cached per user."""
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = SuggestedUserSerializer
+
+    def get(self, request):
+        cache_key = suggestions_key(request.user.id)
+        suggestions = cache.get(cache_key)
+
+        if suggestions is None:
+            users = suggested_users(request.user)
+            suggestions = self.get_serializer(users, many=True).data
+            cache.set(
+                cache_key,
+                suggestions,
+                timeout=getattr(settings, 'SUGGESTIONS_CACHE_TIMEOUT', 600)
+            )
+
+        return Response(suggestions)
@@ -0,0 +1,116 @@
+"""
+Synthetic social graphs for benchmarking.
+
+Follower counts are drawn from a Pareto (power-law) distribution: most
+users have a handful of followers and a few have very many, which is the
+shape that stresses feed fan-out. Rows are written with bulk inserts, and
+counters, feeds and caches are brought to the state the API would leave
+them in.
+"""
+import random
+import secrets
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from rest_framework.authtoken.models import Token
+
+from accounts import graph as follow_graph
+from posts.bulk import bulk_create_posts
+from posts.counters import reconcile_post_counters
+from posts.models import Comment, Like
+
+BATCH_SIZE = 5000
+
+
+@dataclass
+class GraphSpec:
+    users: int = 500
+    # Pareto exponent of the follower distribution; lower means heavier tail.
+    alpha: float = 2.1
+    min_followers: int = 1
+    max_followers: int = 200
+    posts_per_user: int = 5
+    likes_per_post: int = 3
+    comments_per_post: int = 1
+    seed: int = 0
+
+
+@dataclass
+class BenchmarkGraph:
+    user_ids: List[int]
+    post_ids: List[int]
+    tokens: Dict[int, str] = field(repr=False)
+
+
+def follower_counts(spec, rng):
+    """One follower count per user, power-law distributed and capped."""
+    cap = min(spec.max_followers, spec.users - 1)
+    return [
+        min(cap, int(spec.min_followers * (1 - rng.random()) ** (-1 / (spec.alpha - 1))))
+        for _ in range(spec.users)
+    ]
+
+
+def build_graph(spec):
+    rng = random.Random(spec.seed)
+    User = get_user_model()
+    Follow = User.followers.through
+
+    run = secrets.token_hex(3)
+    password = make_password(None)
+    users = User.objects.bulk_create(
+        [User(username=f"bench-{run}-{number}", password=password) for number in range(spec.users)],
+        batch_size=BATCH_SIZE,
+    )
+    user_ids = [user.pk for user in users]
+
+    # A follow row (from_user=A, to_user=B) means B follows A.
+    follows = []
+    following = Counter()
+    for user, count in zip(users, follower_counts(spec, rng)):
+        followers = [pk for pk in rng.sample(user_ids, count + 1) if pk != user.pk][:count]
+        follows.extend(Follow(from_user_id=user.pk, to_user_id=pk) for pk in followers)
+        following.update(followers)
+        user.follower_count = len(followers)
+    for user in users:
+        user.following_count = following[user.pk]
+
+    Follow.objects.bulk_create(follows, batch_size=BATCH_SIZE)
+    User.objects.bulk_update(users, ['follower_count', 'following_count'], batch_size=BATCH_SIZE)
+    follow_graph.invalidate(user_ids, user_ids)
+
+    tokens = {pk: secrets.token_hex(20) for pk in user_ids}
+    Token.objects.bulk_create(
+        [Token(key=key, user_id=pk) for pk, key in tokens.items()], batch_size=BATCH_SIZE
+    )
+
+    posts = bulk_create_posts(
+        {'author': user, 'title': f"Benchmark post {number}", 'content': "Lorem ipsum " * 20}
+        for user in users
+        for number in range(spec.posts_per_user)
+    )
+    post_ids = [post.pk for post in posts]
+
+    likes_per_post = min(spec.likes_per_post, spec.users)
+    Like.objects.bulk_create(
+        [
+            Like(user_id=pk, post_id=post_id)
+            for post_id in post_ids
+            for pk in rng.sample(user_ids, likes_per_post)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    Comment.objects.bulk_create(
+        [
+            Comment(post_id=post_id, author_id=rng.choice(user_ids), content="Benchmark comment")
+            for post_id in post_ids
+            for _ in range(spec.comments_per_post)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    reconcile_post_counters()
+
+    return BenchmarkGraph(user_ids=user_ids, post_ids=post_ids, tokens=tokens)
@@ -0,0 +1,117 @@
+import json
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from benchmarks.graph import GraphSpec, build_graph
+from benchmarks.report import format_table, summarize
+from benchmarks.runner import DEFAULT_MIX, parse_mix, run_workload
+from notifications.dispatch import flush
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic social graph and drive feed reads, likes, comments, follows "
+        "and notification polling with concurrent workers, reporting throughput and "
+        "p50/p95/p99 latency per operation. Runs in a disposable database unless "
+        "--use-existing-db is given."
+    )
+
+    def add_arguments(self, parser):
+        defaults = GraphSpec()
+        parser.add_argument('--users', type=int, default=defaults.users)
+        parser.add_argument('--alpha', type=float, default=defaults.alpha,
+                            help="Power-law exponent of follower counts (> 1).")
+        parser.add_argument('--min-followers', type=int, default=defaults.min_followers)
+        parser.add_argument('--max-followers', type=int, default=defaults.max_followers)
+        parser.add_argument('--posts-per-user', type=int, default=defaults.posts_per_user)
+        parser.add_argument('--likes-per-post', type=int, default=defaults.likes_per_post)
+        parser.add_argument('--comments-per-post', type=int, default=defaults.comments_per_post)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds to run for.")
+        parser.add_argument('--requests', type=int, default=None,
+                            help="Stop after this many requests instead of --duration.")
+        parser.add_argument('--mix', default=','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items()),
+                            help="Operation weights, e.g. feed=40,like=15.")
+        parser.add_argument('--seed', type=int, default=defaults.seed)
+        parser.add_argument('--use-existing-db', action='store_true',
+                            help="Write the synthetic graph into the configured database.")
+        parser.add_argument('--json', dest='json_path', help="Also write the report here as JSON.")
+
+    def handle(self, *args, **options):
+        if options['alpha'] <= 1:
+            raise CommandError("--alpha must be greater than 1.")
+        try:
+            mix = parse_mix(options['mix'])
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        spec = GraphSpec(
+            users=options['users'],
+            alpha=options['alpha'],
+            min_followers=options['min_followers'],
+            max_followers=options['max_followers'],
+            posts_per_user=options['posts_per_user'],
+            likes_per_post=options['likes_per_post'],
+            comments_per_post=options['comments_per_post'],
+            seed=options['seed'],
+        )
+
+        if options['verbosity'] < 2:
+            # Failed requests are counted in the report; their tracebacks are
+            # only printed with -v 2.
+            logging.getLogger('django.request').setLevel(logging.CRITICAL)
+
+        with self.database(options['use_existing_db']):
+            setup_test_environment()
+            try:
+                self.stdout.write(f"Building a graph of {spec.users} users on {connection.vendor}...")
+                graph = build_graph(spec)
+                self.stdout.write(
+                    f"Running {options['workers']} workers over {len(graph.post_ids)} posts..."
+                )
+                samples, elapsed = run_workload(
+                    graph,
+                    mix=mix,
+                    workers=options['workers'],
+                    duration=options['duration'],
+                    requests=options['requests'],
+                    seed=options['seed'],
+                )
+                flush()
+            finally:
+                teardown_test_environment()
+
+        rows = summarize(samples, elapsed)
+        self.stdout.write(format_table(rows))
+        if options['json_path']:
+            with open(options['json_path'], 'w') as handle:
+                json.dump({'spec': vars(spec), 'workers': options['workers'], 'results': rows},
+                          handle, indent=2)
+
+    @contextmanager
+    def database(self, use_existing):
+        """Create and later destroy a throwaway copy of the schema, like the test runner."""
+        if use_existing:
+            yield
+            return
+
+        old_name = connection.settings_dict['NAME']
+        scratch = None
+        if connection.vendor == 'sqlite':
+            # A file rather than the in-memory default, so worker threads share it.
+            scratch = tempfile.mkdtemp()
+            connection.settings_dict['TEST']['NAME'] = os.path.join(scratch, 'benchmark.sqlite3')
+
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            if scratch:
+                os.rmdir(scratch)
@@ -0,0 +1,54 @@
+import math
+from collections import defaultdict
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _row(operation, samples, elapsed):
+    latencies = sorted(sample.seconds for sample in samples)
+    row = {
+        'operation': operation,
+        'requests': len(samples),
+        'errors': sum(not sample.ok for sample in samples),
+        'throughput': len(samples) / elapsed if elapsed else 0.0,
+        'mean_ms': 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+    }
+    for percent in PERCENTILES:
+        row[f'p{percent}_ms'] = 1000 * percentile(latencies, percent)
+    row['max_ms'] = 1000 * latencies[-1] if latencies else 0.0
+    return row
+
+
+def summarize(samples, elapsed):
+    """One row per operation, then a ``total`` row; throughput is per second of wall time."""
+    by_operation = defaultdict(list)
+    for sample in samples:
+        by_operation[sample.operation].append(sample)
+
+    rows = [_row(operation, by_operation[operation], elapsed) for operation in sorted(by_operation)]
+    rows.append(_row('total', samples, elapsed))
+    return rows
+
+
+def format_table(rows):
+    columns = ['operation', 'requests', 'errors', 'throughput', 'mean_ms']
+    columns += [f'p{percent}_ms' for percent in PERCENTILES] + ['max_ms']
+
+    def cell(value):
+        return f'{value:.1f}' if isinstance(value, float) else str(value)
+
+    table = [columns] + [[cell(row[column]) for column in columns] for row in rows]
+    widths = [max(len(line[index]) for line in table) for index in range(len(columns))]
+    return '\n'.join(
+        '  '.join(value.ljust(width) if index == 0 else value.rjust(width)
+                  for index, (value, width) in enumerate(zip(line, widths)))
+        for line in table
+    )
@@ -0,0 +1,143 @@
+"""
+Concurrent workload driver.
+
+Each worker is a thread with its own Django test client, so requests go
+through the full middleware and DRF stack in-process, with no network in
+between. On every iteration a worker picks a random user and an operation
+weighted by the mix, times the request and records the result. The run
+stops after ``duration`` seconds, or after ``requests`` requests in total.
+"""
+import itertools
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+from django.db import connections
+from django.test import Client
+
+DEFAULT_MIX = {
+    'feed': 40,
+    'post_list': 15,
+    'like': 15,
+    'comment': 10,
+    'follow': 5,
+    'notifications': 10,
+    'unread_count': 5,
+}
+
+
+def _feed(client, graph, rng, user_id, **headers):
+    return client.get('/api/feed/', **headers)
+
+
+def _post_list(client, graph, rng, user_id, **headers):
+    return client.get('/api/posts/', **headers)
+
+
+def _like(client, graph, rng, user_id, **headers):
+    return client.post(f'/api/posts/{rng.choice(graph.post_ids)}/like/', **headers)
+
+
+def _comment(client, graph, rng, user_id, **headers):
+    return client.post(
+        '/api/comments/', {'post': rng.choice(graph.post_ids), 'content': "Benchmark"}, **headers
+    )
+
+
+def _follow(client, graph, rng, user_id, **headers):
+    target_id = rng.choice(graph.user_ids)
+    while target_id == user_id:
+        target_id = rng.choice(graph.user_ids)
+    return client.post(f'/api/accounts/follow/{target_id}/', **headers)
+
+
+def _notifications(client, graph, rng, user_id, **headers):
+    return client.get('/api/notifications/', **headers)
+
+
+def _unread_count(client, graph, rng, user_id, **headers):
+    return client.get('/api/notifications/unread_count/', **headers)
+
+
+OPERATIONS = {
+    'feed': _feed,
+    'post_list': _post_list,
+    'like': _like,
+    'comment': _comment,
+    'follow': _follow,
+    'notifications': _notifications,
+    'unread_count': _unread_count,
+}
+
+
+@dataclass
+class Sample:
+    operation: str
+    seconds: float
+    ok: bool
+
+
+def parse_mix(text):
+    """``"feed=40,like=10"`` -> ``{"feed": 40.0, "like": 10.0}``."""
+    mix = {}
+    for part in filter(None, (part.strip() for part in text.split(','))):
+        name, _, weight = part.partition('=')
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name!r}; choose from {', '.join(OPERATIONS)}.")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def run_workload(graph, mix=None, workers=4, duration=10.0, requests=None, seed=0):
+    """
+    Drive the API and return ``(samples, elapsed_seconds)``.
+
+    With a single worker everything runs on the calling thread, which also
+    lets the runner see data from an open transaction (e.g. in tests).
+    """
+    mix = mix or DEFAULT_MIX
+    names, weights = list(mix), list(mix.values())
+    issued = itertools.count()
+    deadline = None if requests else time.perf_counter() + duration
+    results = [[] for _ in range(workers)]
+
+    def should_stop():
+        if requests:
+            return next(issued) >= requests
+        return time.perf_counter() >= deadline
+
+    def work(number):
+        rng = random.Random(seed + number)
+        client = Client(raise_request_exception=False)
+        samples = results[number]
+        while not should_stop():
+            user_id = rng.choice(graph.user_ids)
+            operation = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            response = OPERATIONS[operation](
+                client, graph, rng, user_id, HTTP_AUTHORIZATION=f'Token {graph.tokens[user_id]}'
+            )
+            samples.append(Sample(operation, time.perf_counter() - started, response.status_code < 400))
+
+    def work_in_thread(number):
+        try:
+            work(number)
+        finally:
+            connections.close_all()
+
+    started = time.perf_counter()
+    if workers == 1:
+        work(0)
+    else:
+        threads = [
+            threading.Thread(target=work_in_thread, args=(number,), name=f'benchmark-{number}')
+            for number in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - started
+
+    return [sample for samples in results for sample in samples], elapsed
@@ -0,0 +1,47 @@
+import random
+
+from django.test import TestCase
+
+from social_media_api.testing import SocialAPITestCase
+
+from .graph import GraphSpec, build_graph, follower_counts
+from .report import percentile, summarize
+from .runner import Sample, run_workload
+
+
+class GraphGeneratorTestCase(TestCase):
+    """
+    Tests for the power-law follower distribution of the synthetic graph.
+    """
+
+    def test_follower_counts_are_heavy_tailed_and_capped(self):
+        counts = sorted(follower_counts(GraphSpec(users=2000, max_followers=300), random.Random(1)))
+
+        self.assertLessEqual(counts[-1], 300)
+        self.assertLessEqual(counts[len(counts) // 2], 3)
+        self.assertGreater(counts[-1], 50)
+
+
+class BenchmarkRunTestCase(SocialAPITestCase):
+    """
+    Tests a small end-to-end benchmark run and its percentile report.
+    """
+
+    def test_small_run_reports_every_operation(self):
+        graph = build_graph(GraphSpec(users=20, max_followers=10, posts_per_user=2))
+        self.assertEqual(len(graph.post_ids), 40)
+
+        samples, elapsed = run_workload(graph, workers=1, requests=60)
+        rows = summarize(samples, elapsed)
+
+        self.assertEqual(rows[-1]["operation"], "total")
+        self.assertEqual(rows[-1]["requests"], 60)
+        self.assertEqual(rows[-1]["errors"], 0)
+
+    def test_percentiles_use_nearest_rank(self):
+        latencies = [index / 1000 for index in range(1, 101)]
+        self.assertEqual(percentile(latencies, 50), 0.05)
+        self.assertEqual(percentile(latencies, 99), 0.099)
+
+        rows = summarize([Sample("feed", 0.01, True), Sample("feed", 0.03, False)], 1.0)
+        self.assertEqual((rows[0]["requests"], rows[0]["errors"], rows[0]["p95_ms"]), (2, 1, 30.0))
@@ -0,0 +1,150 @@
+"""
+Fold notification events into aggregate rows.
+
+Events for the same recipient, verb and target object are merged into the
+recipient's existing unread notification for that group, so a popular post
+produces one "alice and 57 others liked your post" row instead of one row
+per like. Existing rows are bumped with an ``F()`` counter update; groups
+without an unread row are inserted with a single ``bulk_create``.
+
+``recent_actors`` is only a short preview, so whether an actor is new to a
+row is decided by its ``NotificationActor`` links instead.
+
+Writers can run at once (the worker thread of each process, or a caller
+writing inline when the queue is full), and ``select_for_update`` cannot
+lock a group row that does not exist yet. Each batch therefore locks its
+recipients' user rows first, so a second writer for the same recipient
+waits and then finds the row the first one created.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Notification, NotificationActor
+
+
+def recent_actors_limit():
+    return getattr(settings, 'NOTIFICATIONS_RECENT_ACTORS', 3)
+
+
+def group_key(recipient_id, verb, target_type_id, target_id):
+    return (recipient_id, verb, target_type_id, target_id)
+
+
+def _group_events(events):
+    groups = {}
+    for event in events:
+        key = group_key(event.recipient_id, event.verb, event.target_type_id, event.target_id)
+        groups.setdefault(key, []).append(event)
+    return groups
+
+
+def _merge_actors(events, previous=(), known=frozenset()):
+    """
+    Newest-first preview list without duplicates, plus the ids of actors
+    not in ``known``, the actors already linked to the row.
+    """
+    seen = set()
+    latest = []
+    new_ids = []
+    for event in reversed(events):
+        if event.actor_id in seen:
+            continue
+        seen.add(event.actor_id)
+        latest.append({'id': event.actor_id, 'username': event.actor_username})
+        if event.actor_id not in known:
+            new_ids.append(event.actor_id)
+    merged = latest + [actor for actor in previous if actor['id'] not in seen]
+    return merged[:recent_actors_limit()], new_ids
+
+
+def _linked_actors(rows, groups):
+    """``{notification_id: {actor_id, ...}}`` for the actors of ``groups`` already linked."""
+    actor_ids = {event.actor_id for key in rows for event in groups[key]}
+    links = NotificationActor.objects.filter(
+        notification_id__in=[row.pk for row in rows.values()], actor_id__in=actor_ids
+    ).values_list('notification_id', 'actor_id')
+    linked = {}
+    for notification_id, actor_id in links:
+        linked.setdefault(notification_id, set()).add(actor_id)
+    return linked
+
+
+def _lock_recipients(keys):
+    recipient_ids = sorted({recipient_id for recipient_id, *_ in keys})
+    # In id order so two batches never wait on each other's locks.
+    list(
+        get_user_model().objects.select_for_update()
+        .filter(pk__in=recipient_ids).order_by('pk').values_list('pk', flat=True)
+    )
+
+
+def _unread_rows(keys):
+    lookup = Q()
+    for recipient_id, verb, target_type_id, target_id in keys:
+        lookup |= Q(
+            recipient_id=recipient_id,
+            verb=verb,
+            target_content_type_id=target_type_id,
+            target_object_id=target_id,
+        )
+    rows = Notification.objects.select_for_update().filter(lookup, is_read=False)
+    return {
+        group_key(row.recipient_id, row.verb, row.target_content_type_id, row.target_object_id): row
+        for row in rows
+    }
+
+
+@transaction.atomic
+def write_aggregated(events):
+    """Persist events; returns the created rows and the existing rows that were bumped."""
+    groups = _group_events(events)
+    if not groups:
+        return [], []
+
+    now = timezone.now()
+    _lock_recipients(groups)
+    existing = _unread_rows(groups)
+    linked = _linked_actors(existing, groups)
+    new_rows = []
+    new_row_actors = []
+    updated_rows = []
+    links = []
+
+    for key, group in groups.items():
+        latest = group[-1]
+        row = existing.get(key)
+
+        if row is None:
+            actors, actor_ids = _merge_actors(group)
+            new_rows.append(Notification(
+                recipient_id=latest.recipient_id,
+                actor_id=latest.actor_id,
+                verb=latest.verb,
+                target=latest.target,
+                target_content_type_id=latest.target_type_id,
+                target_object_id=latest.target_id,
+                actor_count=len(actor_ids),
+                recent_actors=actors,
+            ))
+            new_row_actors.append(actor_ids)
+            continue
+
+        actors, actor_ids = _merge_actors(group, row.recent_actors, linked.get(row.pk, ()))
+        Notification.objects.filter(pk=row.pk).update(
+            actor_id=latest.actor_id,
+            actor_count=F('actor_count') + len(actor_ids),
+            recent_actors=actors,
+            target=latest.target,
+            timestamp=now,
+        )
+        links += [NotificationActor(notification_id=row.pk, actor_id=actor_id) for actor_id in actor_ids]
+        updated_rows.append(row)
+
+    created = Notification.objects.bulk_create(new_rows)
+    for row, actor_ids in zip(created, new_row_actors):
+        links += [NotificationActor(notification_id=row.pk, actor_id=actor_id) for actor_id in actor_ids]
+    NotificationActor.objects.bulk_create(links)
+    return created, updated_rows
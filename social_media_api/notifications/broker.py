@@ -0,0 +1,55 @@
+"""
+In-process pub/sub for live notification streams.
+
+Each open stream subscribes an ``asyncio.Queue`` on the ASGI event loop.
+``publish`` may be called from any thread (typically the dispatch worker)
+and hands payloads to the subscribers' loops with ``call_soon_threadsafe``.
+Subscribers only see notifications written by the same process, so a
+multi-process deployment needs a shared broker behind the same interface.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+
+class NotificationBroker:
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=getattr(settings, 'NOTIFICATIONS_STREAM_BUFFER', 100))
+        with self._lock:
+            self._subscribers[user_id].add((loop, queue))
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id, set())
+            subscribers.difference_update({sub for sub in subscribers if sub[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(user_id, None)
+
+    def has_subscribers(self, user_id):
+        return bool(self._subscribers.get(user_id))
+
+    def publish(self, user_id, payload):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(self._offer, queue, payload)
+
+    @staticmethod
+    def _offer(queue, payload):
+        try:
+            queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # A stalled client misses live updates; the list endpoint has them.
+            pass
+
+
+broker = NotificationBroker()
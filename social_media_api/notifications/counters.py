@@ -0,0 +1,47 @@
+"""
+Per-user unread notification counters.
+
+The count lives in the cache and is adjusted when aggregate notifications
+are created, marked read or deleted, so the unread badge is a single cache
+read. A missing key is rebuilt from a COUNT over the partial unread index.
+
+Adjustments are best effort: an increment that finds no key is dropped,
+and with a per-process cache one process never sees another's changes.
+Keys therefore expire after ``NOTIFICATIONS_UNREAD_COUNT_TTL`` seconds and
+the next read recounts, which bounds how long a wrong count is served.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Notification
+
+
+def _key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_count(user_id):
+    count = cache.get(_key(user_id))
+    if count is None:
+        count = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+        # add() so that of two concurrent recounts the first one cached wins.
+        timeout = getattr(settings, 'NOTIFICATIONS_UNREAD_COUNT_TTL', 60)
+        if not cache.add(_key(user_id), count, timeout=timeout):
+            count = cache.get(_key(user_id), count)
+    return count
+
+
+def increment_unread(user_id, delta=1):
+    try:
+        cache.incr(_key(user_id), delta)
+    except ValueError:
+        # Not cached yet; the next read recounts.
+        pass
+
+
+def decrement_unread(user_id, delta=1):
+    try:
+        if cache.decr(_key(user_id), delta) < 0:
+            cache.delete(_key(user_id))
+    except ValueError:
+        pass
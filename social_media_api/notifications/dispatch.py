@@ -0,0 +1,169 @@
+"""
+Notification dispatch.
+
+Views call ``notify()``, which only puts a small event on an in-process queue
+once the surrounding transaction commits. A daemon worker thread drains the
+queue and writes each batch through ``aggregation.write_aggregated``, so
+request latency no longer includes notification writes. With
+``NOTIFICATIONS_ASYNC = False`` (or when the queue is full) events are
+written inline instead.
+"""
+import atexit
+import logging
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import close_old_connections, transaction
+
+from .aggregation import write_aggregated
+from .broker import broker
+from .counters import increment_unread
+from .models import Notification
+from .serializers import NotificationSerializer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class NotificationEvent:
+    recipient_id: int
+    actor_id: int
+    actor_username: str
+    verb: str
+    target: Optional[str] = None
+    target_type_id: Optional[int] = None
+    target_id: Optional[int] = None
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+_queue = queue.Queue(maxsize=_setting('NOTIFICATIONS_QUEUE_SIZE', 10000))
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def write_notifications(events):
+    """Persist a batch of events; returns the newly created notifications."""
+    created, updated = write_aggregated(events)
+    for notification in created:
+        increment_unread(notification.recipient_id)
+    _publish(created + updated)
+    return created
+
+
+def _publish(notifications):
+    """Push written rows to any live streams open for their recipients."""
+    streamed_ids = [
+        notification.pk for notification in notifications
+        if broker.has_subscribers(notification.recipient_id)
+    ]
+    if not streamed_ids:
+        return
+
+    for notification in Notification.objects.filter(pk__in=streamed_ids):
+        broker.publish(notification.recipient_id, dict(NotificationSerializer(notification).data))
+
+
+class NotificationWorker(threading.Thread):
+    """Drains the event queue, writing up to a batch per flush interval."""
+
+    def __init__(self):
+        super().__init__(name='notification-worker', daemon=True)
+
+    def run(self):
+        while True:
+            batch = [_queue.get()]
+            self._fill(batch)
+            try:
+                write_notifications(batch)
+            except Exception:
+                logger.exception("Dropped %d notifications", len(batch))
+            finally:
+                for _ in batch:
+                    _queue.task_done()
+                close_old_connections()
+
+    def _fill(self, batch):
+        batch_size = _setting('NOTIFICATIONS_BATCH_SIZE', 100)
+        timeout = _setting('NOTIFICATIONS_FLUSH_INTERVAL', 0.5)
+        while len(batch) < batch_size:
+            try:
+                batch.append(_queue.get(timeout=timeout))
+            except queue.Empty:
+                return
+
+
+def _ensure_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = NotificationWorker()
+            _worker.start()
+
+
+def enqueue(event):
+    if not _setting('NOTIFICATIONS_ASYNC', True):
+        write_notifications([event])
+        return
+
+    _ensure_worker()
+    try:
+        _queue.put_nowait(event)
+    except queue.Full:
+        # Apply back-pressure to the caller rather than losing the event.
+        write_notifications([event])
+
+
+def notify(recipient_id, actor, verb, target=None):
+    """
+    Queue a notification for the recipient once the current transaction commits.
+
+    ``target`` is the model instance acted on (e.g. a post), or None for
+    events about the recipient themselves such as a follow.
+    """
+    if recipient_id == actor.pk:
+        return
+
+    target_label = target_type_id = target_id = None
+    if target is not None:
+        target_label = str(target)[:255]
+        target_type_id = ContentType.objects.get_for_model(target).pk
+        target_id = target.pk
+
+    event = NotificationEvent(
+        recipient_id=recipient_id,
+        actor_id=actor.pk,
+        actor_username=actor.username,
+        verb=verb,
+        target=target_label,
+        target_type_id=target_type_id,
+        target_id=target_id,
+    )
+    transaction.on_commit(lambda: enqueue(event))
+
+
+def flush():
+    """Block until every queued event has been written."""
+    if _worker is not None and _worker.is_alive():
+        _queue.join()
+        return
+
+    events = []
+    while True:
+        try:
+            events.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    if events:
+        write_notifications(events)
+        for _ in events:
+            _queue.task_done()
+
+
+atexit.register(flush)
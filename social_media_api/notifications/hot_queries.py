@@ -0,0 +1,25 @@
+"""Querysets behind the notification endpoints; see ``social_media_api.explain``."""
+from django.utils import timezone
+
+from social_media_api.explain import hot_query
+
+from .models import Notification
+
+PAGE_SIZE = 20
+
+
+@hot_query('notifications.list_page')
+def notification_list_page():
+    return Notification.objects.filter(
+        recipient_id=1, timestamp__lt=timezone.now()
+    ).order_by('-timestamp', '-id')[:PAGE_SIZE]
+
+
+@hot_query('notifications.unread_count')
+def unread_notifications():
+    return Notification.objects.filter(recipient_id=1, is_read=False)
+
+
+@hot_query('notifications.mark_read')
+def mark_read_up_to():
+    return Notification.objects.filter(recipient_id=1, is_read=False, timestamp__lte=timezone.now())
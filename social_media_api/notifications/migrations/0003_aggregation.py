@@ -0,0 +1,48 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_recent_actors(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    rows = Notification.objects.select_related('actor').only('id', 'actor__username')
+    for row in rows.iterator():
+        row.recent_actors = [{'id': row.actor_id, 'username': row.actor.username}]
+        row.save(update_fields=['recent_actors'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('notifications', '0002_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actor_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='recent_actors',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='target_content_type',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='target_object_id',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['recipient', 'verb', 'target_content_type', 'target_object_id'], name='notif_unread_group_idx'),
+        ),
+        migrations.RunPython(populate_recent_actors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_aggregation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['recipient', 'id'], name='notif_unread_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def link_known_actors(apps, schema_editor):
+    # Only unread rows absorb new events; link the actors they already name.
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationActor = apps.get_model('notifications', 'NotificationActor')
+    rows = Notification.objects.filter(is_read=False).only('id', 'actor_id', 'recent_actors')
+    links = []
+    for row in rows.iterator():
+        actor_ids = {row.actor_id} | {actor['id'] for actor in row.recent_actors}
+        links += [NotificationActor(notification_id=row.id, actor_id=actor_id) for actor_id in actor_ids]
+    NotificationActor.objects.bulk_create(links, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0004_unread_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationActor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('actor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='actor_links', to='notifications.notification')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='notificationactor',
+            constraint=models.UniqueConstraint(fields=('notification', 'actor'), name='unique_notification_actor'),
+        ),
+        migrations.RunPython(link_known_actors, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
 
 
 class Notification(models.Model):
@@ -15,8 +17,61 @@ class Notification(models.Model):
     )
     verb = models.CharField(max_length=255)
     target = models.CharField(max_length=255, blank=True, null=True)
+    target_content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='+'
+    )
+    target_object_id = models.PositiveBigIntegerField(blank=True, null=True)
+    target_object = GenericForeignKey('target_content_type', 'target_object_id')
     timestamp = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
+    # Unread notifications for the same (recipient, verb, target) are folded
+    # into one row: ``actor`` is the latest actor, ``actor_count`` how many
+    # acted and ``recent_actors`` a short [{"id", "username"}, ...] list,
+    # newest first.
+    actor_count = models.PositiveIntegerField(default=1)
+    recent_actors = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['recipient', '-timestamp', '-id'],
+                name='notif_recipient_ts_idx'
+            ),
+            models.Index(
+                fields=['recipient', 'verb', 'target_content_type', 'target_object_id'],
+                condition=models.Q(is_read=False),
+                name='notif_unread_group_idx'
+            ),
+            # Serves the unread COUNT and mark-read's timestamp range.
+            models.Index(
+                fields=['recipient', 'timestamp'],
+                condition=models.Q(is_read=False),
+                name='notif_unread_idx'
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.actor} {self.verb}"
\ No newline at end of file
+        return f"{self.actor} {self.verb}"
+
+
+class NotificationActor(models.Model):
+    """One row per distinct actor folded into a notification, so ``actor_count`` stays exact."""
+    notification = models.ForeignKey(
+        Notification,
+        on_delete=models.CASCADE,
+        related_name='actor_links'
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['notification', 'actor'], name='unique_notification_actor'),
+        ]
@@ -4,6 +4,38 @@ from .models import Notification
 
 
 class NotificationSerializer(serializers.ModelSerializer):
+    summary = serializers.SerializerMethodField()
+
     class Meta:
         model = Notification
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+    def get_summary(self, obj):
+        """e.g. "alice and 57 others liked your post"."""
+        names = [actor['username'] for actor in obj.recent_actors]
+        if not names:
+            return obj.verb
+
+        others = obj.actor_count - 1
+        if others == 0:
+            return f"{names[0]} {obj.verb}"
+        if others == 1 and len(names) > 1:
+            return f"{names[0]} and {names[1]} {obj.verb}"
+        return f"{names[0]} and {others} others {obj.verb}"
+
+class MarkReadSerializer(serializers.Serializer):
+    """
+    ``timestamp`` is that of the newest notification the client has shown.
+    Aggregation moves a row's timestamp forward when it absorbs new activity,
+    so rows updated after the client looked stay unread. ``ids`` optionally
+    narrows the update to the notifications actually displayed.
+    """
+    timestamp = serializers.DateTimeField(required=False)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False, max_length=100
+    )
+
+    def validate(self, attrs):
+        if 'ids' in attrs and 'timestamp' not in attrs:
+            raise serializers.ValidationError({"timestamp": "Required together with ids."})
+        return attrs
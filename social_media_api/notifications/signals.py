@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .counters import decrement_unread
+from .models import Notification
+
+
+# Rows also go when their actor or target is deleted; keep the badge in
+# step once the deletion has committed.
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    if not instance.is_read:
+        recipient_id = instance.recipient_id
+        transaction.on_commit(lambda: decrement_unread(recipient_id))
@@ -1,3 +1,283 @@
-from django.test import TestCase
+import asyncio
+import time
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import override_settings
+
+from posts.models import Post
+from social_media_api.testing import LOCMEM_CACHE, QueryBudgetTestCase, SocialAPITestCase
+
+from . import dispatch
+from .broker import broker
+from .models import Notification
+
+
+class NotificationDispatchTestCase(SocialAPITestCase):
+    """
+    Tests that likes, comments and follows notify the affected user.
+    """
+
+    def setUp(self):
+        self.author = self.make_user("author")
+        self.fan = self.make_user("fan")
+        self.post = Post.objects.create(author=self.author, title="Hello", content="text")
+        self.authenticate(self.fan)
+
+    def test_like_comment_and_follow_notify_recipient(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/posts/{self.post.id}/like/")
+            self.client.post("/api/comments/", {"post": self.post.id, "content": "Nice"})
+            self.client.post(f"/api/accounts/follow/{self.author.id}/")
+
+        verbs = set(self.author.notifications.values_list("verb", flat=True))
+        self.assertEqual(
+            verbs,
+            {"liked your post", "commented on your post", "started following you"},
+        )
+
+    def test_no_notification_for_own_actions(self):
+        self.authenticate(self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/posts/{self.post.id}/like/")
+
+        self.assertFalse(Notification.objects.exists())
+
+    @override_settings(NOTIFICATIONS_ASYNC=True)
+    def test_async_mode_only_enqueues_during_request(self):
+        with mock.patch.object(dispatch, "_ensure_worker"):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(f"/api/posts/{self.post.id}/like/")
+
+            self.assertFalse(Notification.objects.exists())
+            dispatch.flush()
+
+        self.assertEqual(self.author.notifications.count(), 1)
+
+
+class NotificationAggregationTestCase(SocialAPITestCase):
+    """
+    Tests that repeated events on one target collapse into a single row.
+    """
+
+    def setUp(self):
+        self.author = self.make_user("author")
+        self.post = Post.objects.create(author=self.author, title="Viral", content="text")
+        self.fans = [self.make_user(f"fan{number}") for number in range(4)]
+
+    def like_as(self, user):
+        self.authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/posts/{self.post.id}/like/")
+
+    def test_likes_collapse_into_one_notification(self):
+        for fan in self.fans:
+            self.like_as(fan)
+
+        notification = self.author.notifications.get()
+        self.assertEqual(notification.actor_count, 4)
+        self.assertEqual(
+            [actor["username"] for actor in notification.recent_actors],
+            ["fan3", "fan2", "fan1"],
+        )
+
+        self.authenticate(self.author)
+        response = self.client.get("/api/notifications/")
+        self.assertEqual(response.data["results"][0]["summary"], "fan3 and 3 others liked your post")
+
+    def test_batch_writes_group_events(self):
+        events = [
+            dispatch.NotificationEvent(
+                recipient_id=self.author.id,
+                actor_id=fan.id,
+                actor_username=fan.username,
+                verb="liked your post",
+                target=self.post.title,
+                target_type_id=ContentType.objects.get_for_model(Post).id,
+                target_id=self.post.id,
+            )
+            for fan in self.fans + self.fans[:1]
+        ]
+
+        dispatch.write_notifications(events)
+
+        self.assertEqual(self.author.notifications.get().actor_count, 4)
+
+    @override_settings(NOTIFICATIONS_RECENT_ACTORS=1)
+    def test_actors_beyond_the_preview_are_not_counted_twice(self):
+        for fan in self.fans:
+            self.like_as(fan)
+        # fan0 fell off the one-actor preview long ago, then likes again.
+        self.authenticate(self.fans[0])
+        self.client.post(f"/api/posts/{self.post.id}/unlike/")
+        self.like_as(self.fans[0])
+
+        notification = self.author.notifications.get()
+        self.assertEqual(notification.actor_count, 4)
+        self.assertEqual(notification.recent_actors, [{"id": self.fans[0].id, "username": "fan0"}])
+
+    def test_read_notifications_start_a_new_group(self):
+        self.like_as(self.fans[0])
+        self.author.notifications.update(is_read=True)
+        self.like_as(self.fans[1])
+
+        self.assertEqual(self.author.notifications.count(), 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class UnreadCountTestCase(SocialAPITestCase):
+    """
+    Tests for the cached unread counter and bulk mark-as-read.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = self.make_user("reader")
+        self.actor = self.make_user("actor")
+        self.authenticate(self.user)
+
+    def add_notification(self, verb):
+        with self.captureOnCommitCallbacks(execute=True):
+            dispatch.notify(self.user.id, self.actor, verb)
+
+    def test_unread_count_is_served_from_the_counter(self):
+        self.add_notification("waved at you")
+        self.assertEqual(self.client.get("/api/notifications/unread_count/").data["unread_count"], 1)
+
+        self.add_notification("started following you")
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/notifications/unread_count/")
+        self.assertEqual(response.data["unread_count"], 2)
+
+    def test_deleting_the_actor_uncounts_their_notifications(self):
+        self.add_notification("waved at you")
+        self.assertEqual(self.client.get("/api/notifications/unread_count/").data["unread_count"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.actor.delete()
+        self.assertEqual(self.client.get("/api/notifications/unread_count/").data["unread_count"], 0)
+
+    @override_settings(NOTIFICATIONS_UNREAD_COUNT_TTL=0.05)
+    def test_drifted_count_heals_when_it_expires(self):
+        self.add_notification("waved at you")
+        self.client.get("/api/notifications/unread_count/")
+        Notification.objects.update(is_read=True)
+
+        time.sleep(0.1)
+        self.assertEqual(self.client.get("/api/notifications/unread_count/").data["unread_count"], 0)
+
+    def test_mark_read_up_to_timestamp(self):
+        self.add_notification("waved at you")
+        self.add_notification("started following you")
+        seen = self.client.get("/api/notifications/").data["results"]
+        self.add_notification("poked you")
+
+        response = self.client.post(
+            "/api/notifications/mark_read/", {"timestamp": seen[0]["timestamp"]}, format="json"
+        )
+        self.assertEqual(response.data, {"marked_read": 2, "unread_count": 1})
+
+        response = self.client.post("/api/notifications/mark_read/")
+        self.assertEqual(response.data, {"marked_read": 1, "unread_count": 0})
+
+    def test_mark_read_keeps_rows_updated_after_they_were_seen(self):
+        post = Post.objects.create(author=self.user, title="Hello", content="text")
+        fans = [self.make_user(f"fan{number}") for number in range(2)]
+        self.add_notification("waved at you")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            dispatch.notify(self.user.id, fans[0], "liked your post", target=post)
+        seen = self.client.get("/api/notifications/").data["results"]
+        # The like row absorbs new activity after the client rendered it.
+        with self.captureOnCommitCallbacks(execute=True):
+            dispatch.notify(self.user.id, fans[1], "liked your post", target=post)
+
+        response = self.client.post(
+            "/api/notifications/mark_read/",
+            {"timestamp": seen[0]["timestamp"], "ids": [row["id"] for row in seen]},
+            format="json",
+        )
+        self.assertEqual(response.data["marked_read"], 1)
+        self.assertFalse(Notification.objects.get(verb="liked your post").is_read)
+
+    def test_ids_need_a_timestamp(self):
+        response = self.client.post("/api/notifications/mark_read/", {"ids": [1]}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class NotificationStreamTestCase(SocialAPITestCase):
+    """
+    Tests for the Server-Sent Events notification stream.
+    """
+
+    def setUp(self):
+        self.user = self.make_user("listener")
+        self.actor = self.make_user("actor")
+
+    async def test_stream_requires_authentication(self):
+        response = await self.async_client.get("/api/notifications/stream/")
+        self.assertEqual(response.status_code, 401)
+
+    async def test_stream_pushes_new_notifications(self):
+        token = await sync_to_async(lambda: self.user.auth_token.key)()
+        response = await self.async_client.get(
+            "/api/notifications/stream/", headers={"Authorization": f"Token {token}"}
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        events = aiter(response.streaming_content)
+        self.assertEqual(await anext(events), b"retry: 5000\n\n")
+
+        next_event = asyncio.ensure_future(anext(events))
+        await asyncio.sleep(0)
+        await sync_to_async(dispatch.write_notifications)([
+            dispatch.NotificationEvent(
+                recipient_id=self.user.id,
+                actor_id=self.actor.id,
+                actor_username=self.actor.username,
+                verb="started following you",
+            )
+        ])
+
+        chunk = (await asyncio.wait_for(next_event, timeout=5)).decode()
+        self.assertIn("event: notification", chunk)
+        self.assertIn("actor started following you", chunk)
+        await events.aclose()
+
+    @override_settings(NOTIFICATIONS_STREAM_MAX_AGE=0.2, NOTIFICATIONS_STREAM_HEARTBEAT=0.05)
+    async def test_stream_ends_and_releases_its_subscription(self):
+        token = await sync_to_async(lambda: self.user.auth_token.key)()
+        response = await self.async_client.get(
+            "/api/notifications/stream/", headers={"Authorization": f"Token {token}"}
+        )
+
+        events = aiter(response.streaming_content)
+        await anext(events)
+        self.assertTrue(broker.has_subscribers(self.user.id))
+
+        # The client never closes the stream; it still finishes on its own.
+        remaining = await asyncio.wait_for(self._drain(events), timeout=5)
+        self.assertTrue(all(chunk == b": keep-alive\n\n" for chunk in remaining))
+        self.assertFalse(broker.has_subscribers(self.user.id))
+
+    @staticmethod
+    async def _drain(events):
+        return [chunk async for chunk in events]
+
+
+class NotificationQueryBudgetTestCase(QueryBudgetTestCase):
+    """
+    Query budgets for the request/response endpoints in
+    ``notifications.urls``; the stream is covered by its own tests.
+    """
+
+    def test_notification_list(self):
+        self.assertQueryBudget(2, lambda seeded: self.client.get("/api/notifications/"))
+
+    def test_unread_count(self):
+        self.assertQueryBudget(2, lambda seeded: self.client.get("/api/notifications/unread_count/"))
+
+    def test_mark_read(self):
+        self.assertQueryBudget(3, lambda seeded: self.client.post("/api/notifications/mark_read/"))
@@ -1,6 +1,10 @@
 from django.urls import path
-from .views import NotificationListView
+from .views import NotificationListView, UnreadCountView, MarkReadView
+from .views import notification_stream
 
 urlpatterns = [
     path('', NotificationListView.as_view(), name='notifications'),
+    path('unread_count/', UnreadCountView.as_view(), name='notifications-unread-count'),
+    path('mark_read/', MarkReadView.as_view(), name='notifications-mark-read'),
+    path('stream/', notification_stream, name='notifications-stream'),
 ]
\ No newline at end of file
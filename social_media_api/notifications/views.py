@@ -1,13 +1,131 @@
-from rest_framework import generics, permissions
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework import exceptions, generics, permissions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from .models import Notification
-from .serializers import NotificationSerializer
+from .broker import broker
+from .counters import decrement_unread, unread_count
+from .serializers import MarkReadSerializer, NotificationSerializer
+from social_media_api.metrics import MetricsMixin
+from social_media_api.pagination import TimestampCursorPagination
 
 
-class NotificationListView(generics.ListAPIView):
+class NotificationListView(MetricsMixin, generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TimestampCursorPagination
 
     def get_queryset(self):
         return Notification.objects.filter(
             recipient=self.request.user
-        ).order_by('-timestamp')
\ No newline at end of file
+        ).order_by('-timestamp')
+
+
+class UnreadCountView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({"unread_count": unread_count(request.user.id)})
+
+
+class MarkReadView(generics.GenericAPIView):
+    """
+    Mark unread notifications no newer than ``timestamp`` (optionally only
+    ``ids``) as read in one UPDATE; with no body, mark everything read.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = MarkReadSerializer
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        unread = Notification.objects.filter(recipient=request.user, is_read=False)
+        if 'timestamp' in serializer.validated_data:
+            unread = unread.filter(timestamp__lte=serializer.validated_data['timestamp'])
+        if 'ids' in serializer.validated_data:
+            unread = unread.filter(id__in=serializer.validated_data['ids'])
+
+        updated = unread.update(is_read=True)
+        decrement_unread(request.user.id, updated)
+
+        return Response({
+            "marked_read": updated,
+            "unread_count": unread_count(request.user.id)
+        })
+
+
+def _authenticate_stream(request):
+    """Resolve the user with the API's authenticators, or a ``?token=`` query parameter."""
+    authenticators = [auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    user = Request(request, authenticators=authenticators).user
+    if user.is_authenticated:
+        return user
+
+    # Browsers' EventSource cannot send an Authorization header.
+    key = request.GET.get("token")
+    if not key:
+        return None
+    token_auth = next(
+        (auth for auth in authenticators if isinstance(auth, TokenAuthentication)),
+        TokenAuthentication(),
+    )
+    user, _ = token_auth.authenticate_credentials(key)
+    return user
+
+
+async def _notification_events(user_id):
+    """
+    Yield events until ``NOTIFICATIONS_STREAM_MAX_AGE`` passes.
+
+    Django's ASGI handler keeps iterating a streaming response after the
+    client disconnects, so the lifetime cap is what eventually releases an
+    abandoned subscription. Live clients reconnect after the ``retry`` delay.
+    """
+    heartbeat = getattr(settings, 'NOTIFICATIONS_STREAM_HEARTBEAT', 15)
+    retry = getattr(settings, 'NOTIFICATIONS_STREAM_RETRY', 5000)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + getattr(settings, 'NOTIFICATIONS_STREAM_MAX_AGE', 300)
+    queue = broker.subscribe(user_id)
+    try:
+        yield f"retry: {retry}\n\n"
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                payload = await asyncio.wait_for(queue.get(), timeout=min(heartbeat, remaining))
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle connection.
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {payload['id']}\nevent: notification\ndata: {json.dumps(payload)}\n\n"
+    finally:
+        broker.unsubscribe(user_id, queue)
+
+
+async def notification_stream(request):
+    """
+    Server-Sent Events stream of the user's new and updated notifications.
+
+    Served by the ASGI event loop, so an idle client costs one suspended
+    coroutine instead of repeated list queries.
+    """
+    try:
+        user = await sync_to_async(_authenticate_stream)(request)
+    except exceptions.AuthenticationFailed as exc:
+        return JsonResponse({"detail": str(exc.detail)}, status=401)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    response = StreamingHttpResponse(
+        _notification_events(user.id),
+        content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
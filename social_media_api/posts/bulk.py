@@ -0,0 +1,54 @@
+"""
+Creating many posts at once.
+
+``bulk_create`` skips ``save()`` and the model signals, so everything the
+single-post path does as a side effect is repeated here explicitly: author
+post counts, feed fan-out and response cache invalidation.
+"""
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+
+from .cache import POSTS_SCOPE
+from .feed import fan_out_posts
+from .models import Post
+from social_media_api.cache import bump_version
+
+
+def bulk_chunk_size():
+    return getattr(settings, 'POSTS_BULK_CHUNK_SIZE', 500)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+@transaction.atomic
+def bulk_create_posts(items, chunk_size=None):
+    """
+    Insert posts from validated data (each item includes its ``author``).
+
+    Returns the created posts. Either every post is written or none is.
+    """
+    posts = []
+    for chunk in chunked(items, chunk_size or bulk_chunk_size()):
+        posts.extend(Post.objects.bulk_create([Post(**item) for item in chunk]))
+
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append(post)
+
+    User = get_user_model()
+    for author_id, author_posts in by_author.items():
+        User.objects.filter(pk=author_id).update(post_count=F('post_count') + len(author_posts))
+        fan_out_posts(author_posts[0].author, author_posts)
+
+    if posts:
+        transaction.on_commit(lambda: bump_version(POSTS_SCOPE))
+    return posts
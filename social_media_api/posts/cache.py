@@ -0,0 +1,50 @@
+"""
+Cache scopes for post responses.
+
+See ``social_media_api.cache`` for how scope versions key cached responses.
+"""
+from social_media_api.cache import bump_version
+
+from .models import Post
+
+POSTS_SCOPE = 'posts'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def following_scope(user_id):
+    return f'following:{user_id}'
+
+
+def invalidate_post(post_id):
+    """
+    Expire the post's detail response and the cached listings showing it,
+    e.g. after a like or comment changed its counters.
+    """
+    bump_version(post_scope(post_id))
+
+
+def invalidate_post_listings(post_id):
+    """A post was created, edited or deleted: every listing may gain or lose it."""
+    bump_version(POSTS_SCOPE, post_scope(post_id))
+
+
+def invalidate_author_posts(author_id):
+    """
+    The author's avatar changed: expire every response showing one of their
+    posts, i.e. each post's detail and the listings embedding it.
+    """
+    post_ids = Post.objects.filter(author_id=author_id).values_list('id', flat=True)
+    bump_version(*(post_scope(post_id) for post_id in post_ids.iterator()))
+
+
+def embedded_post_scopes(data):
+    """Scopes of the posts in a (paginated or plain) post listing."""
+    results = data['results'] if isinstance(data, dict) else data
+    return [post_scope(post['id']) for post in results]
+
+
+def invalidate_following(*user_ids):
+    bump_version(*(following_scope(user_id) for user_id in user_ids))
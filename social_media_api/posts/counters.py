@@ -0,0 +1,56 @@
+"""
+Recount the denormalized ``Post.like_count`` / ``Post.comment_count`` columns.
+
+The views keep the counters up to date with atomic ``F()`` updates, but rows
+removed through cascades (e.g. a deleted user's likes) bypass them.
+``reconcile_post_counters`` finds drifted posts with one annotated query and
+fixes them in chunked ``UPDATE`` statements.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Like, Post
+
+
+def _count_subquery(model):
+    rows = (
+        model.objects.filter(post=OuterRef('pk'))
+        .order_by()
+        .values('post')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def actual_like_count():
+    return _count_subquery(Like)
+
+
+def actual_comment_count():
+    return _count_subquery(Comment)
+
+
+def drifted_post_ids():
+    return (
+        Post.objects.annotate(
+            actual_likes=actual_like_count(),
+            actual_comments=actual_comment_count(),
+        )
+        .filter(~Q(like_count=F('actual_likes')) | ~Q(comment_count=F('actual_comments')))
+        .values_list('id', flat=True)
+    )
+
+
+def reconcile_post_counters(chunk_size=1000, dry_run=False):
+    """Fix drifted counters and return the number of posts that were off."""
+    post_ids = list(drifted_post_ids())
+    if dry_run:
+        return len(post_ids)
+
+    for start in range(0, len(post_ids), chunk_size):
+        Post.objects.filter(id__in=post_ids[start:start + chunk_size]).update(
+            like_count=actual_like_count(),
+            comment_count=actual_comment_count(),
+        )
+    return len(post_ids)
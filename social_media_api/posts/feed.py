@@ -0,0 +1,196 @@
+"""
+Materialized home timelines.
+
+New posts are pushed into a ``FeedItem`` row per follower when they are
+saved (fan-out-on-write), so reading a feed is a range scan over the
+reader's own rows. Authors with more followers than
+``FEED_FANOUT_FOLLOWER_LIMIT`` are not fanned out; their posts get a
+``PulledPost`` row instead and are merged in when the feed is read
+(fan-out-on-read). That holds for the life of the post, so it stays in
+feeds when the author's count later drops back below the limit and for
+readers who follow them afterwards.
+
+Feeds are paged on ``(created_at, post_id)`` keys, which ``FeedItem`` rows
+copy from their post. A page is one walk down the reader's
+``(owner, -created_at, -post)`` index plus, when they follow pull authors,
+one read of the followed authors' newest pulled posts, merged in key order.
+"""
+import heapq
+from itertools import groupby
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from accounts import graph
+
+from .models import FeedItem, Post, PulledPost
+
+BATCH_SIZE = 1000
+
+
+def fanout_follower_limit():
+    return getattr(settings, 'FEED_FANOUT_FOLLOWER_LIMIT', 5000)
+
+
+def backfill_limit():
+    return getattr(settings, 'FEED_BACKFILL_LIMIT', 200)
+
+
+def is_pull_author(author):
+    """
+    Authors above the fan-out limit are read on demand instead of pushed.
+
+    ``author`` is often ``request.user``, possibly from the token cache, and
+    its counter is only ever changed with ``F()`` updates, so the count is
+    read fresh from the database.
+    """
+    follower_count = (
+        get_user_model().objects.filter(pk=author.pk).values_list('follower_count', flat=True).first()
+    )
+    return (follower_count or 0) > fanout_follower_limit()
+
+
+def _bulk_insert(items):
+    batch = []
+    created = 0
+    for item in items:
+        batch.append(item)
+        if len(batch) >= BATCH_SIZE:
+            FeedItem.objects.bulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+            batch = []
+    if batch:
+        FeedItem.objects.bulk_create(batch, ignore_conflicts=True)
+        created += len(batch)
+    return created
+
+
+def fan_out_post(post):
+    """Push a freshly created post into every follower's feed."""
+    return fan_out_posts(post.author, [post])
+
+
+def fan_out_posts(author, posts):
+    """
+    Push several new posts by one author, reading the follower list once.
+
+    A pull author's posts are recorded for fan-out-on-read instead.
+    """
+    if is_pull_author(author):
+        PulledPost.objects.bulk_create(
+            [PulledPost(post_id=post.id, author_id=author.id, created_at=post.created_at) for post in posts],
+            ignore_conflicts=True,
+        )
+        return 0
+
+    follower_ids = graph.follower_ids_from_db(author.id)
+    return _bulk_insert(
+        FeedItem(
+            owner_id=follower_id,
+            post_id=post.id,
+            author_id=author.id,
+            created_at=post.created_at,
+        )
+        for post in posts
+        for follower_id in follower_ids
+    )
+
+
+def backfill_feed(user, author):
+    """
+    Copy the author's recent posts into the feed of a new follower.
+
+    Pull authors are included: their posts from before they crossed the
+    limit have no ``PulledPost`` row to be read through.
+    """
+    recent_posts = (
+        Post.objects.filter(author=author)
+        .order_by('-created_at')
+        .values_list('id', 'created_at')[:backfill_limit()]
+    )
+    return _bulk_insert(
+        FeedItem(
+            owner_id=user.id,
+            post_id=post_id,
+            author_id=author.id,
+            created_at=created_at,
+        )
+        for post_id, created_at in recent_posts
+    )
+
+
+def backfill_feed_from(user, author_ids):
+    """Backfill several newly followed authors with one windowed query."""
+    recent_posts = (
+        Post.objects.filter(author_id__in=list(author_ids))
+        .annotate(
+            author_rank=Window(
+                RowNumber(),
+                partition_by=[F('author_id')],
+                order_by=[F('created_at').desc(), F('id').desc()],
+            )
+        )
+        .filter(author_rank__lte=backfill_limit())
+        .values_list('id', 'author_id', 'created_at')
+    )
+    return _bulk_insert(
+        FeedItem(
+            owner_id=user.id,
+            post_id=post_id,
+            author_id=author_id,
+            created_at=created_at,
+        )
+        for post_id, author_id, created_at in recent_posts
+    )
+
+
+def prune_feed(user, author):
+    """Drop an unfollowed author's posts from the user's feed."""
+    deleted, _ = FeedItem.objects.filter(owner=user, author=author).delete()
+    return deleted
+
+
+def prune_feed_from(user, author_ids):
+    """Drop several unfollowed authors' posts from the user's feed."""
+    deleted, _ = FeedItem.objects.filter(owner=user, author_id__in=list(author_ids)).delete()
+    return deleted
+
+
+def rebuild_feed(user):
+    """Recreate a user's feed from scratch, e.g. for rows written before fan-out existed."""
+    FeedItem.objects.filter(owner=user).delete()
+    return backfill_feed_from(user, graph.following_ids_from_db(user.id))
+
+
+def _older_than(queryset, position, key_field):
+    if position is None:
+        return queryset
+    created_at, key = position
+    return queryset.filter(created_at__lte=created_at).exclude(
+        created_at=created_at, **{f'{key_field}__gte': key}
+    )
+
+
+def feed_keys(user, position, limit):
+    """
+    Up to ``limit`` ``(created_at, post_id)`` keys of the user's timeline
+    that are older than ``position``, newest first.
+    """
+    pushed = _older_than(FeedItem.objects.filter(owner=user), position, 'post_id')
+    keys = list(
+        pushed.order_by('-created_at', '-post_id').values_list('created_at', 'post_id')[:limit]
+    )
+
+    pulled = _older_than(PulledPost.objects.filter(author__followers=user), position, 'post_id')
+    pulled_keys = list(
+        pulled.order_by('-created_at', '-post_id').values_list('created_at', 'post_id')[:limit]
+    )
+    if not pulled_keys:
+        return keys
+
+    # A new follower's backfill may also copy pulled posts into FeedItem
+    # rows; equal keys are adjacent after the merge.
+    merged = heapq.merge(keys, pulled_keys, reverse=True)
+    return [key for key, _ in groupby(merged)][:limit]
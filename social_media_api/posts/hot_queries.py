@@ -0,0 +1,69 @@
+"""Querysets behind the post, comment, feed and trending endpoints; see ``social_media_api.explain``."""
+from django.utils import timezone
+
+from social_media_api.explain import hot_query
+
+from .feed import backfill_limit
+from .models import Comment, FeedItem, Like, Post, PulledPost, TrendingScore
+from .previews import recent_comments_prefetch
+from .trending import trending_size
+
+PAGE_SIZE = 20
+
+
+@hot_query('posts.list_page')
+def post_list_page():
+    return Post.objects.filter(created_at__lt=timezone.now()).order_by('-created_at', '-id')[:PAGE_SIZE]
+
+
+@hot_query('posts.author_recent')
+def author_recent_posts():
+    return Post.objects.filter(author_id=1).order_by('-created_at').values_list(
+        'id', 'created_at'
+    )[:backfill_limit()]
+
+
+@hot_query('posts.feed_page')
+def feed_page():
+    return FeedItem.objects.filter(owner_id=1, created_at__lt=timezone.now()).order_by(
+        '-created_at', '-post_id'
+    ).values_list('created_at', 'post_id')[:PAGE_SIZE]
+
+
+@hot_query('posts.feed_pulled')
+def feed_pulled():
+    return PulledPost.objects.filter(author__followers=1, created_at__lt=timezone.now()).order_by(
+        '-created_at', '-post_id'
+    ).values_list('created_at', 'post_id')[:PAGE_SIZE]
+
+
+@hot_query('posts.feed_prune')
+def feed_prune():
+    return FeedItem.objects.filter(owner_id=1, author_id=2)
+
+
+@hot_query('posts.comments_page')
+def post_comments_page():
+    return Comment.objects.filter(post_id=1).order_by('-created_at', '-id')[:PAGE_SIZE]
+
+
+@hot_query('posts.comment_previews')
+def comment_previews():
+    return recent_comments_prefetch().queryset.filter(post_id__in=range(1, PAGE_SIZE + 1))
+
+
+@hot_query('posts.liked_by_viewer')
+def liked_by_viewer():
+    return Like.objects.filter(user_id=1, post_id__in=range(1, PAGE_SIZE + 1)).values_list(
+        'post_id', flat=True
+    )
+
+
+@hot_query('posts.trending_top')
+def trending_top():
+    return Post.objects.filter(trending__isnull=False).order_by('-trending__score')[:trending_size()]
+
+
+@hot_query('posts.trending_prune')
+def trending_prune():
+    return TrendingScore.objects.filter(score__lt=0.0)
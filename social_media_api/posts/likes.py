@@ -0,0 +1,78 @@
+"""
+Race-free like/unlike.
+
+Each toggle is one INSERT ... ON CONFLICT DO NOTHING (or one DELETE)
+followed by one UPDATE ... RETURNING on the post. The first statement's
+row count says whether the state changed, and the second applies the
+counter delta and reads the new count back. Nothing is read before it is
+written, so concurrent double-taps neither raise ``IntegrityError`` nor
+skew ``like_count``.
+
+Needs ``RETURNING`` and ``ON CONFLICT`` support: SQLite 3.35+ or
+PostgreSQL. These statements skip the ``Like`` signals, so callers
+invalidate cached responses themselves.
+"""
+from dataclasses import dataclass
+
+from django.db import connection
+from django.utils import timezone
+
+from .models import Like, Post
+
+
+@dataclass
+class LikeResult:
+    post: Post
+    liked: bool
+    changed: bool
+
+
+def _quoted(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def _apply_delta(cursor, post_id, delta):
+    cursor.execute(
+        f"UPDATE {_quoted(Post)} SET like_count = like_count + %s WHERE id = %s "
+        "RETURNING like_count, author_id, title",
+        [delta, post_id],
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    like_count, author_id, title = row
+    return Post(id=post_id, author_id=author_id, title=title, like_count=like_count)
+
+
+def like_post(user_id, post_id):
+    """Like the post; returns None when it does not exist. Call inside a transaction."""
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {_quoted(Like)} (user_id, post_id, created_at) "
+            f"SELECT %s, id, %s FROM {_quoted(Post)} WHERE id = %s "
+            "ON CONFLICT (user_id, post_id) DO NOTHING",
+            [user_id, now, post_id],
+        )
+        changed = cursor.rowcount == 1
+        post = _apply_delta(cursor, post_id, 1 if changed else 0)
+    return post and LikeResult(post=post, liked=True, changed=changed)
+
+
+def unlike_post(user_id, post_id):
+    """Remove the like; returns None when the post does not exist. Call inside a transaction."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {_quoted(Like)} WHERE user_id = %s AND post_id = %s",
+            [user_id, post_id],
+        )
+        changed = cursor.rowcount == 1
+        post = _apply_delta(cursor, post_id, -1 if changed else 0)
+    return post and LikeResult(post=post, liked=False, changed=changed)
+
+
+def liked_post_ids(user, post_ids):
+    """The subset of ``post_ids`` the user has liked, in one query."""
+    return set(
+        Like.objects.filter(user=user, post_id__in=post_ids).values_list('post_id', flat=True)
+    )
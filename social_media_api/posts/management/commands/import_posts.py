@@ -0,0 +1,73 @@
+import json
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.bulk import bulk_chunk_size, bulk_create_posts
+from posts.serializers import PostSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Import posts from an NDJSON file, one {\"title\", \"content\"} object per line. "
+        "Lines may name their own \"author\" username. The file is streamed and "
+        "each chunk is committed on its own; invalid lines are reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="NDJSON file to read, or - for stdin.")
+        parser.add_argument('--author', help="Username used for lines without an author.")
+        parser.add_argument('--chunk-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        chunk_size = options['chunk_size'] or bulk_chunk_size()
+        authors = {}
+
+        def resolve_author(username):
+            if username not in authors:
+                authors[username] = User.objects.filter(username=username).first()
+            return authors[username]
+
+        if options['author'] and resolve_author(options['author']) is None:
+            raise CommandError(f"Unknown author {options['author']!r}.")
+
+        stream = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8')
+        imported = skipped = 0
+        pending = []
+        with stream:
+            for number, line in enumerate(stream, start=1):
+                if not line.strip():
+                    continue
+
+                error = None
+                try:
+                    item = json.loads(line)
+                except ValueError as exc:
+                    error = f"invalid JSON ({exc})"
+                else:
+                    if not isinstance(item, dict):
+                        error = "expected a JSON object"
+                    else:
+                        author = resolve_author(item.get('author') or options['author'])
+                        serializer = PostSerializer(data=item)
+                        if author is None:
+                            error = "unknown or missing author"
+                        elif not serializer.is_valid():
+                            error = json.dumps(serializer.errors)
+
+                if error:
+                    skipped += 1
+                    self.stderr.write(f"Line {number}: {error}")
+                    continue
+
+                pending.append({**serializer.validated_data, 'author': author})
+                if len(pending) >= chunk_size:
+                    imported += len(bulk_create_posts(pending, chunk_size))
+                    pending = []
+
+        if pending:
+            imported += len(bulk_create_posts(pending, chunk_size))
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {imported} posts, skipped {skipped} lines."))
@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from posts.feed import rebuild_feed
+
+
+class Command(BaseCommand):
+    help = "Rebuild materialized feeds from the current follow graph."
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='*', type=int, help="Only rebuild these users' feeds.")
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.all()
+        if options['user_ids']:
+            users = users.filter(id__in=options['user_ids'])
+
+        for user in users.iterator():
+            written = rebuild_feed(user)
+            self.stdout.write(f"{user.username}: {written} feed items")
+
+        self.stdout.write(self.style.SUCCESS("Feeds rebuilt."))
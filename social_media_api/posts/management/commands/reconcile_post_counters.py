@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import reconcile_post_counters
+
+
+class Command(BaseCommand):
+    help = "Recount like_count and comment_count for posts whose counters drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Only report drifted posts.")
+
+    def handle(self, *args, **options):
+        drifted = reconcile_post_counters(
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run'],
+        )
+
+        if options['dry_run']:
+            self.stdout.write(f"{drifted} posts have drifted counters.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Reconciled counters on {drifted} posts."))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.trending import update_trending_scores
+
+
+class Command(BaseCommand):
+    help = "Fold likes and comments created since the last run into the trending scores."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--interval', type=float, default=None,
+            help="Keep running, updating every this many seconds."
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = update_trending_scores(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"Folded {processed} events into trending scores."))
+
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:00
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+
+    def count_of(model_name):
+        model = apps.get_model('posts', model_name)
+        rows = (
+            model.objects.filter(post=OuterRef('pk'))
+            .order_by()
+            .values('post')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+    Post.objects.update(like_count=count_of('Like'), comment_count=count_of('Comment'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
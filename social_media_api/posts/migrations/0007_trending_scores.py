@@ -0,0 +1,32 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingWatermark',
+            fields=[
+                ('source', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('last_id', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.post')),
+                ('score', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-score'], name='trending_score_idx')],
+            },
+        ),
+    ]
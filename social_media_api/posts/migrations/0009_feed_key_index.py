@@ -0,0 +1,21 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='feeditem',
+            name='feed_owner_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='feeditem',
+            index=models.Index(fields=['owner', '-created_at', '-post'], name='feed_owner_created_idx'),
+        ),
+    ]
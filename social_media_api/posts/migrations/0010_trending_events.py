@@ -0,0 +1,26 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_feed_key_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=32)),
+                ('key', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='trendingevent',
+            constraint=models.UniqueConstraint(fields=('source', 'key'), name='unique_trending_event'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def record_pulled_posts(apps, schema_editor):
+    # Posts of authors above the limit were read by follower count before;
+    # keep them in feeds after the author drops back below it.
+    Post = apps.get_model('posts', 'Post')
+    PulledPost = apps.get_model('posts', 'PulledPost')
+    limit = getattr(settings, 'FEED_FANOUT_FOLLOWER_LIMIT', 5000)
+    rows = Post.objects.filter(author__follower_count__gt=limit).values_list('id', 'author_id', 'created_at')
+    PulledPost.objects.bulk_create(
+        (
+            PulledPost(post_id=post_id, author_id=author_id, created_at=created_at)
+            for post_id, author_id, created_at in rows.iterator()
+        ),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0010_trending_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PulledPost',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='pull_entry', serialize=False, to='posts.post')),
+                ('created_at', models.DateTimeField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pulled_posts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['author', '-created_at', '-post'], name='pulled_author_created_idx')],
+            },
+        ),
+        migrations.RunPython(record_pulled_posts, migrations.RunPython.noop),
+    ]
@@ -12,6 +12,15 @@ class Post(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized counters, kept in step with F() updates by the views.
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='post_created_id_idx'),
+            models.Index(fields=['author', '-created_at'], name='post_author_created_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -32,6 +41,12 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='comment_created_id_idx'),
+            models.Index(fields=['post', '-created_at', '-id'], name='comment_post_created_idx'),
+        ]
+
     def __str__(self):
         return f"Comment by {self.author.username}"
     
@@ -49,7 +64,116 @@ class Like(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        unique_together = ('user', 'post')  
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'], name='unique_like'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} liked {self.post.title}"
+
+
+class FeedItem(models.Model):
+    """
+    One row per (follower, post) so a timeline read is a range scan on
+    owner. ``created_at`` is copied from the post to order and page by.
+    """
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='feed_items'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'post'], name='unique_feed_item'),
+        ]
+        indexes = [
+            models.Index(fields=['owner', '-created_at', '-post'], name='feed_owner_created_idx'),
+            models.Index(fields=['owner', 'author'], name='feed_owner_author_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.post} in {self.owner}'s feed"
+
+
+class PulledPost(models.Model):
+    """
+    A post that was not fanned out because its author was above the
+    fan-out limit. Feeds read these on demand for as long as the post
+    exists, whatever the author's follower count is later.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='pull_entry'
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='pulled_posts'
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['author', '-created_at', '-post'], name='pulled_author_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.post} read on demand"
+
+
+class TrendingScore(models.Model):
+    """A post's time-decayed engagement score, maintained by ``posts.trending``."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending'
+    )
+    score = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score'], name='trending_score_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.user.username} liked {self.post.title}"
\ No newline at end of file
+        return f"{self.post} trending at {self.score:.2f}"
+
+
+class TrendingWatermark(models.Model):
+    """The like/comment id up to which every row has been folded into the scores."""
+    source = models.CharField(max_length=32, primary_key=True)
+    last_id = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.source} up to {self.last_id}"
+
+
+class TrendingEvent(models.Model):
+    """
+    An engagement already folded into the trending scores: ``key`` is
+    ``"<user_id>:<post_id>"`` for likes and the comment id for comments.
+    """
+    source = models.CharField(max_length=32)
+    key = models.CharField(max_length=64)
+    created_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'key'], name='unique_trending_event'),
+        ]
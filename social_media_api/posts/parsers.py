@@ -0,0 +1,45 @@
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Newline-delimited JSON: one object per line, parsed into a list.
+
+    The body is read a line at a time and parsing stops with a
+    ``ParseError`` once it passes ``POSTS_BULK_MAX_BYTES`` bytes or
+    ``POSTS_BULK_MAX_ITEMS`` objects, so an oversized upload is rejected
+    without being held in memory.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        max_bytes = getattr(settings, 'POSTS_BULK_MAX_BYTES', 1024 * 1024)
+        max_items = getattr(settings, 'POSTS_BULK_MAX_ITEMS', 1000)
+
+        items = []
+        remaining = max_bytes
+        number = 0
+        while True:
+            # One byte over the budget is enough to tell the body is too large.
+            line = stream.readline(remaining + 1)
+            if not line:
+                return items
+            remaining -= len(line)
+            if remaining < 0:
+                raise ParseError(f"NDJSON body is larger than {max_bytes} bytes.")
+            number += 1
+            line = line.strip()
+            if not line:
+                continue
+            if len(items) == max_items:
+                raise ParseError(f"NDJSON body has more than {max_items} items.")
+            try:
+                items.append(json.loads(line.decode(encoding)))
+            except ValueError as exc:
+                raise ParseError(f"NDJSON parse error on line {number}: {exc}")
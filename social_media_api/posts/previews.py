@@ -0,0 +1,48 @@
+"""
+Bounded comment previews for post listings.
+
+Embedding every comment makes a single viral post blow up every page that
+includes it. ``recent_comments_prefetch`` fetches only the latest
+``COMMENT_PREVIEW_SIZE`` comments per post in one query, numbering each
+post's comments with ``ROW_NUMBER() OVER (PARTITION BY post_id ...)`` and
+keeping the first rows of each partition.
+"""
+from django.conf import settings
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import RowNumber
+
+from .models import Comment
+
+PREVIEW_ATTR = 'recent_comments'
+
+
+def comment_preview_size():
+    return getattr(settings, 'COMMENT_PREVIEW_SIZE', 3)
+
+
+def recent_comments_prefetch(limit=None):
+    limit = limit or comment_preview_size()
+    queryset = (
+        Comment.objects.select_related('author')
+        .annotate(
+            preview_rank=Window(
+                RowNumber(),
+                partition_by=[F('post_id')],
+                order_by=[F('created_at').desc(), F('id').desc()],
+            )
+        )
+        .filter(preview_rank__lte=limit)
+        .order_by('-created_at', '-id')
+    )
+    return Prefetch('comments', queryset=queryset, to_attr=PREVIEW_ATTR)
+
+
+def recent_comments(post, limit=None):
+    """The prefetched preview, or a bounded query when it was not prefetched."""
+    comments = getattr(post, PREVIEW_ATTR, None)
+    if comments is None:
+        comments = (
+            post.comments.select_related('author')
+            .order_by('-created_at', '-id')[:limit or comment_preview_size()]
+        )
+    return comments
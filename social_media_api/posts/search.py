@@ -0,0 +1,86 @@
+"""
+Full-text search over post titles and content.
+
+The index lives in the database and is kept in sync by triggers (see
+migration ``0006_post_search``), so bulk inserts and queryset updates are
+covered too:
+
+* SQLite: an external-content FTS5 table ``posts_post_fts``, ranked with
+  ``bm25`` (title matches weigh double).
+* PostgreSQL: a ``search_vector`` tsvector column with a GIN index, ranked
+  with ``ts_rank``.
+
+Other backends fall back to ``icontains``, which scans the table.
+
+A query is a list of words that must all match; a trailing ``*`` makes a
+word a prefix, e.g. ``djan* tips``.
+
+Migrations that make Django rebuild ``posts_post`` on SQLite drop the
+triggers with the old table and must recreate them.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import Post
+
+TERM_RE = re.compile(r'(\w+)(\*?)')
+
+
+def max_results():
+    return getattr(settings, 'POSTS_SEARCH_MAX_RESULTS', 1000)
+
+
+def parse_query(text):
+    """Split user input into ``(word, is_prefix)`` pairs, dropping any syntax."""
+    return [(word.lower(), bool(star)) for word, star in TERM_RE.findall(text or '')]
+
+
+def _sqlite_ids(terms, limit):
+    match = ' '.join(f'"{word}"' + ('*' if prefix else '') for word, prefix in terms)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT rowid FROM posts_post_fts WHERE posts_post_fts MATCH %s "
+            "ORDER BY bm25(posts_post_fts, 2.0, 1.0), rowid DESC LIMIT %s",
+            [match, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _postgresql_ids(terms, limit):
+    tsquery = ' & '.join(word + (':*' if prefix else '') for word, prefix in terms)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT id FROM posts_post, to_tsquery('pg_catalog.english', %s) query "
+            "WHERE search_vector @@ query "
+            "ORDER BY ts_rank(search_vector, query) DESC, id DESC LIMIT %s",
+            [tsquery, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _fallback_ids(terms, limit):
+    matches = Q()
+    for word, _ in terms:
+        matches &= Q(title__icontains=word) | Q(content__icontains=word)
+    return list(
+        Post.objects.filter(matches)
+        .order_by('-created_at', '-id')
+        .values_list('id', flat=True)[:limit]
+    )
+
+
+def search_post_ids(text, limit=None):
+    """Ids of posts matching ``text``, best match first."""
+    terms = parse_query(text)
+    if not terms:
+        return []
+
+    limit = limit or max_results()
+    if connection.vendor == 'sqlite':
+        return _sqlite_ids(terms, limit)
+    if connection.vendor == 'postgresql':
+        return _postgresql_ids(terms, limit)
+    return _fallback_ids(terms, limit)
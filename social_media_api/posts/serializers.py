@@ -1,6 +1,9 @@
 
 from rest_framework import serializers
+from accounts.serializers import AvatarField
+from .bulk import bulk_create_posts
 from .models import Post, Comment
+from .previews import recent_comments, recent_comments_prefetch
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -18,18 +21,65 @@ class CommentSerializer(serializers.ModelSerializer):
         ]
 
 
+class CommentPreviewSerializer(serializers.ListSerializer):
+    """
+    A post's latest comments. ``optimize_for_serializer`` adds ``prefetch``;
+    posts loaded without it fall back to a bounded query.
+    """
+    prefetch = staticmethod(recent_comments_prefetch)
+
+    def get_attribute(self, instance):
+        return recent_comments(instance)
+
+
+class BulkPostListSerializer(serializers.ListSerializer):
+    """``PostSerializer(many=True)``: validates every item, then bulk inserts them."""
+
+    def create(self, validated_data):
+        return bulk_create_posts(validated_data)
+
+
 class PostSerializer(serializers.ModelSerializer):
     author = serializers.ReadOnlyField(source='author.username')
-    comments = CommentSerializer(many=True, read_only=True)
+    author_avatar = AvatarField(source='author')
+    # Only the latest few comments; the full list is at posts/<pk>/comments/.
+    comments = CommentPreviewSerializer(child=CommentSerializer(), read_only=True)
+    # Annotated by ``posts.viewer.with_viewer_state``; False when absent.
+    liked_by_viewer = serializers.BooleanField(read_only=True, default=False)
+    viewer_follows_author = serializers.BooleanField(read_only=True, default=False)
 
     class Meta:
         model = Post
         fields = [
             'id',
             'author',
+            'author_avatar',
             'title',
             'content',
             'created_at',
             'updated_at',
-            'comments'
-        ]
\ No newline at end of file
+            'like_count',
+            'comment_count',
+            'comments',
+            'liked_by_viewer',
+            'viewer_follows_author'
+        ]
+        read_only_fields = ['like_count', 'comment_count']
+        list_serializer_class = BulkPostListSerializer
+
+class LikedLookupSerializer(serializers.Serializer):
+    """``?ids=1,2,3`` for the batch "liked by me" lookup."""
+    ids = serializers.CharField()
+
+    def validate_ids(self, value):
+        try:
+            ids = list(dict.fromkeys(int(part) for part in value.split(',') if part.strip()))
+        except ValueError:
+            raise serializers.ValidationError("Expected comma-separated post ids.")
+        if not all(0 < post_id < 2 ** 63 for post_id in ids):
+            raise serializers.ValidationError("Post ids must be positive 64-bit integers.")
+        if not ids:
+            raise serializers.ValidationError("At least one post id is required.")
+        if len(ids) > 100:
+            raise serializers.ValidationError("At most 100 post ids per request.")
+        return ids
@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_following, invalidate_post, invalidate_post_listings
+from .models import Comment, Like, Post
+
+User = get_user_model()
+
+
+# Counter updates run after the row is saved, so wait for the whole
+# transaction before expiring cached copies.
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_post_cache(sender, instance, **kwargs):
+    post_id = instance.pk
+    transaction.on_commit(lambda: invalidate_post_listings(post_id))
+
+
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=Like)
+def invalidate_parent_post_cache(sender, instance, **kwargs):
+    post_id = instance.post_id
+    transaction.on_commit(lambda: invalidate_post(post_id))
+
+
+@receiver(m2m_changed, sender=User.followers.through)
+def invalidate_feed_cache(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # ``user.following`` changes: only that user's feed is affected.
+        if not action.startswith('post_'):
+            return
+        follower_ids = [instance.pk]
+    elif action in ('post_add', 'post_remove'):
+        # ``user.followers`` changes: the added/removed followers' feeds are.
+        follower_ids = list(pk_set)
+    elif action == 'pre_clear':
+        follower_ids = list(instance.followers.values_list('id', flat=True))
+    else:
+        return
+
+    transaction.on_commit(lambda: invalidate_following(*follower_ids))
@@ -1,3 +1,714 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+
+from social_media_api.metrics import registry
+from social_media_api.querysets import optimize_for_serializer
+from social_media_api.testing import LOCMEM_CACHE, QueryBudgetTestCase, SocialAPITestCase
+
+from .feed import fan_out_post
+from .models import Comment, FeedItem, Like, Post, TrendingScore, TrendingWatermark
+from .serializers import PostSerializer
+
+User = get_user_model()
+
+
+class FeedTestCase(SocialAPITestCase):
+    """
+    Tests for the materialized feed: fan-out on post, backfill on follow
+    and pruning on unfollow.
+    """
+
+    def setUp(self):
+        self.reader = self.make_user("reader")
+        self.author = self.make_user("author")
+        self.authenticate(self.author)
+
+    def follow(self, user, target):
+        self.authenticate(user)
+        return self.client.post(f"/api/accounts/follow/{target.id}/")
+
+    def feed_titles(self, user):
+        self.authenticate(user)
+        response = self.client.get("/api/feed/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [post["title"] for post in response.data["results"]]
+
+    def test_new_post_is_pushed_to_followers(self):
+        self.follow(self.reader, self.author)
+
+        self.authenticate(self.author)
+        self.client.post("/api/posts/", {"title": "Hello", "content": "World"})
+
+        self.assertTrue(FeedItem.objects.filter(owner=self.reader).exists())
+        self.assertEqual(self.feed_titles(self.reader), ["Hello"])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        Post.objects.create(author=self.author, title="Old", content="post")
+
+        self.follow(self.reader, self.author)
+        self.assertEqual(self.feed_titles(self.reader), ["Old"])
+
+        self.client.post(f"/api/accounts/unfollow/{self.author.id}/")
+        self.assertEqual(self.feed_titles(self.reader), [])
+
+    @override_settings(FEED_FANOUT_FOLLOWER_LIMIT=0)
+    def test_popular_authors_are_merged_on_read(self):
+        self.follow(self.reader, self.author)
+
+        self.authenticate(self.author)
+        self.client.post("/api/posts/", {"title": "Viral", "content": "post"})
+
+        self.assertFalse(FeedItem.objects.exists())
+        self.assertEqual(self.feed_titles(self.reader), ["Viral"])
+
+    @override_settings(FEED_FANOUT_FOLLOWER_LIMIT=1)
+    def test_fan_out_uses_the_current_follower_count(self):
+        stale_author = User.objects.get(pk=self.author.pk)
+        self.follow(self.reader, self.author)
+        self.follow(self.make_user("second"), self.author)
+
+        self.assertEqual(stale_author.follower_count, 0)
+        post = Post.objects.create(author=stale_author, title="Pulled", content="post")
+        self.assertEqual(fan_out_post(post), 0)
+        self.assertFalse(FeedItem.objects.filter(post=post).exists())
+
+    @override_settings(FEED_FANOUT_FOLLOWER_LIMIT=1)
+    def test_pulled_posts_survive_the_author_dropping_below_the_limit(self):
+        second, late = self.make_user("second"), self.make_user("late")
+        self.follow(self.reader, self.author)
+        self.follow(second, self.author)
+        self.authenticate(self.author)
+        self.client.post("/api/posts/", {"title": "Pulled", "content": "post"})
+
+        self.authenticate(second)
+        self.client.post(f"/api/accounts/unfollow/{self.author.id}/")
+        self.assertEqual(self.feed_titles(self.reader), ["Pulled"])
+
+        # Followed during pull mode, then the author drops back again.
+        self.follow(late, self.author)
+        self.authenticate(self.reader)
+        self.client.post(f"/api/accounts/unfollow/{self.author.id}/")
+        self.assertEqual(self.feed_titles(late), ["Pulled"])
+        self.assertEqual(self.feed_titles(self.reader), [])
+
+    @override_settings(FEED_FANOUT_FOLLOWER_LIMIT=1)
+    def test_pages_merge_pushed_and_pulled_posts(self):
+        celebrity = self.make_user("celebrity")
+        self.follow(self.reader, self.author)
+        self.follow(self.reader, celebrity)
+        # Pushed while the celebrity was still under the limit.
+        self.authenticate(celebrity)
+        self.client.post("/api/posts/", {"title": "Early", "content": "post"})
+        self.follow(self.make_user("fan"), celebrity)
+
+        for number in range(3):
+            for user in (self.author, celebrity):
+                self.authenticate(user)
+                self.client.post("/api/posts/", {"title": f"{user.username} {number}", "content": "x"})
+
+        self.authenticate(self.reader)
+        titles = []
+        url = "/api/feed/?page_size=2"
+        while url:
+            response = self.client.get(url)
+            titles += [post["title"] for post in response.data["results"]]
+            url = response.data["next"]
+
+        expected = [f"{name} {number}" for number in (2, 1, 0) for name in ("celebrity", "author")]
+        self.assertEqual(titles, expected + ["Early"])
+
+    def test_invalid_cursor_is_not_found(self):
+        self.authenticate(self.reader)
+        self.assertEqual(self.client.get("/api/feed/?cursor=nonsense").status_code, 404)
+
+
+class CursorPaginationTestCase(SocialAPITestCase):
+    """
+    Tests that list endpoints page with opaque cursors instead of offsets.
+    """
+
+    def setUp(self):
+        self.user = self.make_user("pager")
+        self.authenticate(self.user)
+        for number in range(7):
+            Post.objects.create(author=self.user, title=f"Post {number}", content="text")
+
+    def test_pages_follow_next_cursor_without_gaps(self):
+        response = self.client.get("/api/posts/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+
+        titles = [post["title"] for post in response.data["results"]]
+        response = self.client.get(response.data["next"])
+        titles += [post["title"] for post in response.data["results"]]
+
+        self.assertEqual(titles, [f"Post {number}" for number in reversed(range(7))])
+        self.assertIsNone(response.data["next"])
+
+
+class PostQueryCountTestCase(SocialAPITestCase):
+    """
+    Tests that listing posts does not issue a query per post or comment.
+    """
+
+    def setUp(self):
+        self.user = self.make_user("lister")
+        self.authenticate(self.user)
+
+    def add_posts(self, count):
+        for number in range(count):
+            post = Post.objects.create(author=self.user, title=f"Post {number}", content="text")
+            post.comments.create(author=self.make_user(f"commenter{post.id}"), content="Nice")
+
+    def test_post_list_query_count_is_constant(self):
+        self.add_posts(1)
+        with self.assertNumQueries(3):
+            self.client.get("/api/posts/")
+
+        self.add_posts(4)
+        with self.assertNumQueries(3):
+            self.client.get("/api/posts/")
+
+    def test_feed_query_count_is_constant(self):
+        author = self.make_user("feedauthor")
+        self.client.post(f"/api/accounts/follow/{author.id}/")
+
+        def add_feed_posts(count):
+            self.authenticate(author)
+            for number in range(count):
+                response = self.client.post("/api/posts/", {"title": f"Feed {number}", "content": "x"})
+                self.client.post("/api/comments/", {"post": response.data["id"], "content": "Nice"})
+            self.authenticate(self.user)
+
+        add_feed_posts(1)
+        with self.assertNumQueries(5):
+            self.client.get("/api/feed/")
+
+        add_feed_posts(4)
+        with self.assertNumQueries(5):
+            response = self.client.get("/api/feed/")
+        self.assertEqual(len(response.data["results"]), 5)
+
+    def test_viewer_state_comes_from_the_listing_query(self):
+        author = self.make_user("followed")
+        liked = Post.objects.create(author=author, title="Liked", content="text")
+        Post.objects.create(author=self.user, title="Own", content="text")
+        Like.objects.create(user=self.user, post=liked)
+        self.client.post(f"/api/accounts/follow/{author.id}/")
+
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/posts/")
+        state = {
+            post["title"]: (post["liked_by_viewer"], post["viewer_follows_author"])
+            for post in response.data["results"]
+        }
+        self.assertEqual(state, {"Liked": (True, True), "Own": (False, False)})
+
+        response = self.client.get("/api/feed/")
+        self.assertEqual(
+            [(post["title"], post["liked_by_viewer"]) for post in response.data["results"]],
+            [("Liked", True)]
+        )
+
+
+class PostCounterTestCase(SocialAPITestCase):
+    """
+    Tests for the denormalized like and comment counters.
+    """
+
+    def setUp(self):
+        self.user = self.make_user("counter")
+        self.authenticate(self.user)
+        self.post = Post.objects.create(author=self.user, title="Counted", content="text")
+
+    def test_like_unlike_and_comments_update_counters(self):
+        self.client.post(f"/api/posts/{self.post.id}/like/")
+        self.client.post(f"/api/posts/{self.post.id}/like/")
+        response = self.client.post("/api/comments/", {"post": self.post.id, "content": "Hi"})
+
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (1, 1))
+
+        self.client.post(f"/api/posts/{self.post.id}/unlike/")
+        self.client.post(f"/api/posts/{self.post.id}/unlike/")
+        self.client.delete(f"/api/comments/{response.data['id']}/")
+
+        response = self.client.get(f"/api/posts/{self.post.id}/")
+        self.assertEqual((response.data["like_count"], response.data["comment_count"]), (0, 0))
+
+    def test_like_and_unlike_of_missing_or_invalid_posts_are_not_found(self):
+        for pk in (self.post.id + 100, "abc", "1e3", 2 ** 64):
+            for verb in ("like", "unlike"):
+                response = self.client.post(f"/api/posts/{pk}/{verb}/")
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, (pk, verb))
+        self.assertFalse(Like.objects.exists())
+
+    def test_like_and_unlike_return_state_and_count(self):
+        url = f"/api/posts/{self.post.id}"
+        response = self.client.post(f"{url}/like/")
+        self.assertEqual((response.data["liked"], response.data["like_count"]), (True, 1))
+
+        response = self.client.post(f"{url}/like/")
+        self.assertEqual(response.data["message"], "You already liked this post.")
+        self.assertEqual((response.data["liked"], response.data["like_count"]), (True, 1))
+
+        response = self.client.post(f"{url}/unlike/")
+        self.assertEqual((response.data["liked"], response.data["like_count"]), (False, 0))
+
+        response = self.client.post("/api/posts/999999/like/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_like_writes_are_single_statements(self):
+        # Token lookup, then the INSERT and the UPDATE ... RETURNING inside
+        # a savepoint (the test's own transaction turns atomic into one).
+        with self.assertNumQueries(5):
+            self.client.post(f"/api/posts/{self.post.id}/like/")
+        with self.assertNumQueries(5):
+            self.client.post(f"/api/posts/{self.post.id}/unlike/")
+
+    def test_liked_by_me_batch_lookup(self):
+        other = Post.objects.create(author=self.user, title="Other", content="text")
+        self.client.post(f"/api/posts/{self.post.id}/like/")
+
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/posts/liked/", {"ids": f"{self.post.id},{other.id}"})
+        self.assertEqual(response.data, {str(self.post.id): True, str(other.id): False})
+
+        for ids in ("1,x", "99999999999999999999999", "0", "-1"):
+            response = self.client.get("/api/posts/liked/", {"ids": ids})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_reconcile_fixes_drift(self):
+        Post.objects.filter(pk=self.post.pk).update(like_count=42)
+        self.post.comments.create(author=self.user, content="Untracked")
+
+        call_command("reconcile_post_counters", stdout=StringIO())
+
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (0, 1))
+
+
+class BulkPostTestCase(SocialAPITestCase):
+    """
+    Tests for bulk post creation over the API and from an NDJSON file.
+    """
+
+    def setUp(self):
+        self.reader = self.make_user("bulkreader")
+        self.author = self.make_user("bulkauthor")
+        self.authenticate(self.reader)
+        self.client.post(f"/api/accounts/follow/{self.author.id}/")
+        self.authenticate(self.author)
+
+    def test_json_array_creates_posts_with_side_effects(self):
+        items = [{"title": f"Post {i}", "content": "body"} for i in range(3)]
+        response = self.client.post("/api/posts/bulk/", items, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 3)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.post_count, 3)
+        self.assertEqual(FeedItem.objects.filter(owner=self.reader).count(), 3)
+
+    def test_ndjson_body_is_accepted(self):
+        body = '{"title": "One", "content": "a"}\n\n{"title": "Two", "content": "b"}\n'
+        response = self.client.post(
+            "/api/posts/bulk/", body, content_type="application/x-ndjson"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 2)
+
+    @override_settings(POSTS_BULK_MAX_ITEMS=2, POSTS_BULK_MAX_BYTES=100)
+    def test_ndjson_body_over_the_limits_is_rejected(self):
+        line = '{"title": "T", "content": "c"}\n'
+        for body in (line * 3, '{"title": "T", "content": "%s"}\n' % ("c" * 100)):
+            response = self.client.post(
+                "/api/posts/bulk/", body, content_type="application/x-ndjson"
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Post.objects.exists())
+
+    def test_invalid_item_rejects_the_batch_with_per_item_errors(self):
+        items = [{"title": "Fine", "content": "ok"}, {"content": "no title"}]
+        response = self.client.post("/api/posts/bulk/", items, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("title", response.data[1])
+        self.assertFalse(Post.objects.exists())
+
+    def test_import_command_streams_and_skips_bad_lines(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson", delete=False) as handle:
+            handle.write('{"title": "A", "content": "x"}\n')
+            handle.write('not json\n')
+            handle.write('{"title": "B", "content": "y", "author": "bulkreader"}\n')
+        self.addCleanup(os.remove, handle.name)
+
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            "import_posts", handle.name, author="bulkauthor", chunk_size=1,
+            stdout=stdout, stderr=stderr
+        )
+
+        self.assertIn("Imported 2 posts, skipped 1", stdout.getvalue())
+        self.assertIn("Line 2", stderr.getvalue())
+        self.assertEqual(
+            sorted(Post.objects.values_list("author__username", "title")),
+            [("bulkauthor", "A"), ("bulkreader", "B")]
+        )
+
+
+class PostSearchTestCase(SocialAPITestCase):
+    """
+    Tests for ranked full-text search over titles and content.
+    """
+
+    def setUp(self):
+        self.user = self.make_user("searcher")
+        self.authenticate(self.user)
+        Post.objects.create(author=self.user, title="Django tips", content="Use select_related.")
+        Post.objects.create(author=self.user, title="Gardening", content="Django the gardener.")
+        Post.objects.create(author=self.user, title="Cooking", content="Nothing relevant.")
+
+    def search(self, query):
+        response = self.client.get("/api/posts/search/", {"q": query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [post["title"] for post in response.data["results"]]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.search("django"), ["Django tips", "Gardening"])
+
+    def test_prefix_query(self):
+        self.assertEqual(self.search("gard*"), ["Gardening"])
+        self.assertEqual(self.search("gard"), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        Post.objects.filter(title="Cooking").update(content="Cooking with Django")
+        Post.objects.filter(title="Gardening").delete()
+
+        self.assertEqual(self.search("django"), ["Django tips", "Cooking"])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search('"django ^ (-'), ["Django tips", "Gardening"])
+        response = self.client.get("/api/posts/search/", {"q": "  "})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(COMMENT_PREVIEW_SIZE=2)
+class CommentPreviewTestCase(SocialAPITestCase):
+    """
+    Tests that listings embed a bounded comment preview and the full list
+    is paginated under the post.
+    """
+
+    def setUp(self):
+        self.user = self.make_user("previewer")
+        self.authenticate(self.user)
+        self.post = Post.objects.create(author=self.user, title="Busy", content="text")
+        for number in range(4):
+            self.post.comments.create(author=self.user, content=f"Comment {number}")
+
+    def test_list_embeds_latest_comments_only(self):
+        response = self.client.get("/api/posts/")
+
+        comments = response.data["results"][0]["comments"]
+        self.assertEqual([c["content"] for c in comments], ["Comment 3", "Comment 2"])
+
+    def test_preview_prefetch_is_derived_from_the_serializer(self):
+        posts = list(optimize_for_serializer(Post.objects.all(), PostSerializer))
+
+        with self.assertNumQueries(0):
+            data = PostSerializer(posts, many=True).data
+        self.assertEqual([c["content"] for c in data[0]["comments"]], ["Comment 3", "Comment 2"])
+
+    def test_comments_sub_resource_is_paginated(self):
+        response = self.client.get(f"/api/posts/{self.post.id}/comments/", {"page_size": 3})
+        self.assertEqual(len(response.data["results"]), 3)
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual([c["content"] for c in response.data["results"]], ["Comment 0"])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ResponseCacheTestCase(SocialAPITestCase):
+    """
+    Tests for cached post responses, ETags and signal-driven invalidation.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = self.make_user("cached")
+        self.authenticate(self.user)
+        self.post = Post.objects.create(author=self.user, title="Cached", content="text")
+        self.detail_url = f"/api/posts/{self.post.id}/"
+
+    def test_repeat_reads_are_served_from_cache(self):
+        self.client.get(self.detail_url)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.detail_url)
+        self.assertEqual(response.data["title"], "Cached")
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_none_match_compares_whole_etags(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+
+        for header in (f"W/{etag}", f'"stale", {etag}', "*"):
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=header)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED, header)
+        for header in (f'"x{etag[1:-1]}x"', etag[:-2] + '"'):
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=header)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, header)
+
+    def test_like_invalidates_detail_and_list(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        self.client.get("/api/posts/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/posts/{self.post.id}/like/")
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.data["like_count"], 1)
+        self.assertEqual(self.client.get("/api/posts/").data["results"][0]["like_count"], 1)
+
+    def test_like_does_not_expire_unrelated_listings(self):
+        other = Post.objects.create(author=self.make_user("elsewhere"), title="Other", content="text")
+        self.client.get("/api/posts/?page_size=1")
+        self.client.get("/api/posts/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/posts/{self.post.id}/like/")
+
+        # The one-post page only shows the newer, unliked post.
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/posts/?page_size=1")
+        self.assertEqual(response.data["results"][0]["id"], other.id)
+        response = self.client.get("/api/posts/")
+        self.assertEqual(response.data["results"][1]["like_count"], 1)
+
+    def test_listings_are_cached_per_viewer(self):
+        other = self.make_user("othercached")
+        Like.objects.create(user=other, post=self.post)
+        self.client.get("/api/posts/")
+
+        self.authenticate(other)
+        response = self.client.get("/api/posts/")
+        self.assertTrue(response.data["results"][0]["liked_by_viewer"])
+
+
+class TrendingTestCase(SocialAPITestCase):
+    """
+    Tests for the incrementally maintained, time-decayed trending ranking.
+    """
+
+    def setUp(self):
+        self.user = self.make_user("trender")
+        self.authenticate(self.user)
+        self.fans = [self.make_user(f"fan{i}") for i in range(3)]
+        self.old = Post.objects.create(author=self.user, title="Old hit", content="x")
+        self.fresh = Post.objects.create(author=self.user, title="Fresh", content="x")
+        Post.objects.create(author=self.user, title="Ignored", content="x")
+
+    def trending_titles(self):
+        response = self.client.get("/api/trending/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [post["title"] for post in response.data]
+
+    def update(self):
+        call_command("update_trending", stdout=StringIO())
+
+    def test_recent_engagement_outranks_older_engagement(self):
+        for fan in self.fans:
+            Like.objects.create(user=fan, post=self.old)
+        Like.objects.filter(post=self.old).update(created_at=timezone.now() - timedelta(days=3))
+        Like.objects.create(user=self.fans[0], post=self.fresh)
+
+        self.update()
+        self.assertEqual(self.trending_titles(), ["Fresh", "Old hit"])
+
+    def test_updates_only_fold_in_new_events(self):
+        Like.objects.create(user=self.fans[0], post=self.fresh)
+        self.update()
+        score = TrendingScore.objects.get(post=self.fresh).score
+
+        self.update()
+        self.assertEqual(TrendingScore.objects.get(post=self.fresh).score, score)
+
+        for fan in self.fans:
+            Comment.objects.create(post=self.old, author=fan, content="!")
+        self.update()
+        self.assertEqual(self.trending_titles(), ["Old hit", "Fresh"])
+
+
+    def test_toggling_a_like_counts_once(self):
+        self.authenticate(self.fans[0])
+        self.client.post(f"/api/posts/{self.fresh.id}/like/")
+        self.update()
+        score = TrendingScore.objects.get(post=self.fresh).score
+
+        for _ in range(3):
+            self.client.post(f"/api/posts/{self.fresh.id}/unlike/")
+            self.client.post(f"/api/posts/{self.fresh.id}/like/")
+            self.update()
+        self.assertEqual(TrendingScore.objects.get(post=self.fresh).score, score)
+
+    def test_rows_committed_behind_the_watermark_are_counted(self):
+        late = Like.objects.create(user=self.fans[1], post=self.old)
+        Like.objects.create(user=self.fans[0], post=self.fresh)
+        # The lower id belongs to a transaction that commits after this run.
+        Like.objects.filter(pk=late.pk).delete()
+        self.update()
+        self.assertFalse(TrendingScore.objects.filter(post=self.old).exists())
+
+        Like.objects.create(pk=late.pk, user=self.fans[1], post=self.old)
+        self.update()
+        self.assertTrue(TrendingScore.objects.filter(post=self.old).exists())
+
+    @override_settings(TRENDING_COMMIT_LAG_SECONDS=0)
+    def test_settled_rows_advance_the_watermark(self):
+        like = Like.objects.create(user=self.fans[0], post=self.fresh)
+        self.update()
+        self.assertEqual(TrendingWatermark.objects.get(source="like").last_id, like.id)
+
+
+@override_settings(METRICS_TOKEN="scrape-me", METRICS_SERVER_TIMING=True)
+class RequestMetricsTestCase(SocialAPITestCase):
+    """
+    Tests for per-view query and timing metrics and their Prometheus export.
+    """
+
+    def setUp(self):
+        registry.clear()
+        self.user = self.make_user("measured")
+        self.authenticate(self.user)
+        Post.objects.create(author=self.user, title="Measured", content="text")
+
+    def scrape(self, **headers):
+        self.client.credentials(**headers)
+        return self.client.get("/api/metrics/")
+
+    def test_server_timing_reports_queries_and_serialization(self):
+        response = self.client.get("/api/posts/")
+
+        timing = response["Server-Timing"]
+        self.assertIn('desc="3 queries"', timing)
+        self.assertIn("serialize;dur=", timing)
+
+    def test_metrics_endpoint_exports_histograms(self):
+        self.client.get("/api/posts/")
+        self.client.get("/api/posts/")
+
+        body = self.scrape(HTTP_AUTHORIZATION="Bearer scrape-me").content.decode()
+        labels = 'method="GET",view="post-list"'
+        self.assertIn(f'http_request_db_queries_bucket{{{labels},le="3"}} 2', body)
+        self.assertIn(f"http_request_serialization_seconds_count{{{labels}}} 2", body)
+        self.assertIn("# TYPE auth_token_cache_hits gauge", body)
+
+    def test_metrics_endpoint_requires_the_token(self):
+        self.assertEqual(self.scrape().status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PostQueryBudgetTestCase(QueryBudgetTestCase):
+    """
+    Query budgets for every endpoint in ``posts.urls``.
+    """
+
+    def test_post_list(self):
+        self.assertQueryBudget(3, lambda seeded: self.client.get("/api/posts/"))
+
+    def test_post_detail(self):
+        self.assertQueryBudget(
+            3, lambda seeded: self.client.get(f"/api/posts/{seeded.posts[0].id}/")
+        )
+
+    def test_post_create(self):
+        # Includes a fresh read of the author's follower count before fan-out.
+        self.assertQueryBudget(
+            9, lambda seeded: self.client.post("/api/posts/", {"title": "New", "content": "x"})
+        )
+
+    def test_post_update(self):
+        self.assertQueryBudget(4, lambda seeded: self.client.patch(
+            f"/api/posts/{seeded.own_posts[0].id}/", {"title": "Edited"}
+        ))
+
+    def test_post_delete(self):
+        # The cascade also clears the post's feed, pull, like and comment rows.
+        self.assertQueryBudget(
+            14, lambda seeded: self.client.delete(f"/api/posts/{seeded.own_posts[0].id}/")
+        )
+
+    def test_post_comments(self):
+        self.assertQueryBudget(
+            3, lambda seeded: self.client.get(f"/api/posts/{seeded.posts[0].id}/comments/")
+        )
+
+    def test_post_bulk_create(self):
+        self.assertQueryBudget(8, lambda seeded: self.client.post(
+            "/api/posts/bulk/",
+            [{"title": f"Bulk {number}", "content": "x"} for number in range(len(seeded.authors))],
+            format="json"
+        ))
+
+    def test_post_search(self):
+        self.assertQueryBudget(
+            4, lambda seeded: self.client.get("/api/posts/search/", {"q": "seeded"})
+        )
+
+    def test_liked_lookup(self):
+        self.assertQueryBudget(2, lambda seeded: self.client.get(
+            "/api/posts/liked/", {"ids": ",".join(str(post.id) for post in seeded.posts)}
+        ))
+
+    def test_like(self):
+        self.assertQueryBudget(
+            5, lambda seeded: self.client.post(f"/api/posts/{seeded.posts[0].id}/like/")
+        )
+
+    def test_unlike(self):
+        self.assertQueryBudget(
+            5, lambda seeded: self.client.post(f"/api/posts/{seeded.posts[0].id}/unlike/"),
+            prepare=lambda seeded: Like.objects.create(user=self.viewer, post=seeded.posts[0])
+        )
+
+    def test_comment_list(self):
+        self.assertQueryBudget(2, lambda seeded: self.client.get("/api/comments/"))
+
+    def test_comment_detail(self):
+        self.assertQueryBudget(
+            2, lambda seeded: self.client.get(f"/api/comments/{seeded.own_comments[0].id}/")
+        )
+
+    def test_comment_create(self):
+        self.assertQueryBudget(6, lambda seeded: self.client.post(
+            "/api/comments/", {"post": seeded.posts[0].id, "content": "Hi"}
+        ))
+
+    def test_comment_delete(self):
+        self.assertQueryBudget(
+            6, lambda seeded: self.client.delete(f"/api/comments/{seeded.own_comments[0].id}/")
+        )
+
+    def test_feed(self):
+        self.assertQueryBudget(5, lambda seeded: self.client.get("/api/feed/"))
+
+    def test_trending(self):
+        self.assertQueryBudget(
+            3, lambda seeded: self.client.get("/api/trending/"),
+            prepare=lambda seeded: call_command("update_trending", stdout=StringIO())
+        )
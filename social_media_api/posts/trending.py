@@ -0,0 +1,172 @@
+"""
+Trending posts ranked by time-decayed engagement.
+
+A like or comment at time ``t`` is worth ``weight * 2 ** -(now - t) / H``
+for a half-life ``H``. Every post decays at the same rate, so the ranking
+is unchanged by dropping the ``now`` term. Each row then stores
+``log2(sum(weight * 2 ** ((t - EPOCH) / H)))``, which stays fixed until new
+events arrive. That means:
+
+* ``update_trending_scores`` only folds in likes and comments created
+  since the last run (tracked by ``TrendingWatermark``) and never rescans
+  or rewrites old rows;
+* reading the top N is one scan of the ``-score`` index.
+
+Ids are handed out before transactions commit, so a row can appear after
+a higher id has been processed. The watermark therefore only moves past
+rows older than ``TRENDING_COMMIT_LAG_SECONDS``, and newer rows are
+scanned again on the next run. ``TrendingEvent`` records what has been
+counted: each comment once, and each (user, post) like once, so toggling
+a like cannot add weight repeatedly. Unlikes and deleted comments are not
+subtracted; their weight decays away like everything else.
+"""
+import math
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone as django_timezone
+
+from social_media_api.cache import bump_version
+
+from .models import Comment, Like, TrendingEvent, TrendingScore, TrendingWatermark
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+TRENDING_SCOPE = 'trending'
+
+
+def half_life_seconds():
+    return getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 12) * 3600
+
+
+def trending_size():
+    return getattr(settings, 'TRENDING_SIZE', 50)
+
+
+def event_weights():
+    return {
+        'like': getattr(settings, 'TRENDING_LIKE_WEIGHT', 1.0),
+        'comment': getattr(settings, 'TRENDING_COMMENT_WEIGHT', 2.0),
+    }
+
+
+def commit_lag():
+    return timedelta(seconds=getattr(settings, 'TRENDING_COMMIT_LAG_SECONDS', 300))
+
+
+def _log_time(moment):
+    return (moment - EPOCH).total_seconds() / half_life_seconds()
+
+
+def _log2_add(a, b):
+    """``log2(2 ** a + 2 ** b)`` without overflowing."""
+    if a is None:
+        return b
+    high, low = max(a, b), min(a, b)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def score_floor(now=None):
+    """Scores below this have decayed to nothing and can be pruned."""
+    halvings = getattr(settings, 'TRENDING_PRUNE_HALVINGS', 20)
+    return _log_time(now or django_timezone.now()) - halvings
+
+
+def _fold(post_scores, events, weight):
+    log_weight = math.log2(weight)
+    for post_id, created_at in events:
+        post_scores[post_id] = _log2_add(
+            post_scores.get(post_id), log_weight + _log_time(created_at)
+        )
+
+
+def _save_scores(post_scores, now):
+    existing = TrendingScore.objects.in_bulk(list(post_scores))
+    to_update, to_create = [], []
+    for post_id, score in post_scores.items():
+        row = existing.get(post_id)
+        if row is None:
+            to_create.append(TrendingScore(post_id=post_id, score=score))
+        else:
+            row.score = _log2_add(row.score, score)
+            row.updated_at = now
+            to_update.append(row)
+
+    TrendingScore.objects.bulk_create(to_create)
+    TrendingScore.objects.bulk_update(to_update, ['score', 'updated_at'])
+
+
+def _uncounted(source, rows):
+    """The rows whose event key is not yet in ``TrendingEvent``, recording them."""
+    keys = {key: row for key, row in rows}
+    counted = set(
+        TrendingEvent.objects.filter(source=source, key__in=list(keys)).values_list('key', flat=True)
+    )
+    fresh = {key: row for key, row in keys.items() if key not in counted}
+    TrendingEvent.objects.bulk_create([
+        TrendingEvent(source=source, key=key, created_at=created_at)
+        for key, (_, _, created_at) in fresh.items()
+    ])
+    return fresh.values()
+
+
+def _event_rows(source, model, after_id, batch_size):
+    """``(key, (id, post_id, created_at))`` for rows after ``after_id``, in id order."""
+    if source == 'like':
+        rows = model.objects.filter(id__gt=after_id).order_by('id').values_list(
+            'id', 'post_id', 'created_at', 'user_id'
+        )[:batch_size]
+        return [(f'{user_id}:{post_id}', (pk, post_id, created_at))
+                for pk, post_id, created_at, user_id in rows]
+    rows = model.objects.filter(id__gt=after_id).order_by('id').values_list(
+        'id', 'post_id', 'created_at'
+    )[:batch_size]
+    return [(str(row[0]), row) for row in rows]
+
+
+@transaction.atomic
+def update_trending_scores(batch_size=5000):
+    """Fold new likes and comments into the scores and prune dead rows."""
+    sources = {'like': Like, 'comment': Comment}
+    weights = event_weights()
+    now = django_timezone.now()
+    settled = now - commit_lag()
+    floor = score_floor(now)
+    processed = 0
+
+    for source, model in sources.items():
+        # Locking the watermark keeps concurrent runs from counting an event twice.
+        watermark, _ = TrendingWatermark.objects.select_for_update().get_or_create(source=source)
+        position = watermark.last_id
+        settling = True
+        while True:
+            rows = _event_rows(source, model, position, batch_size)
+            if not rows:
+                break
+            position = rows[-1][1][0]
+
+            fresh = list(_uncounted(source, rows))
+            post_scores = {}
+            _fold(
+                post_scores,
+                ((post_id, created_at) for _, post_id, created_at in fresh
+                 if _log_time(created_at) > floor),
+                weights[source],
+            )
+            _save_scores(post_scores, now)
+            processed += len(fresh)
+
+            # Move past the settled prefix only; everything after it is re-read.
+            for _, (pk, _, created_at) in rows:
+                settling = settling and created_at < settled
+                if not settling:
+                    break
+                watermark.last_id = pk
+        watermark.save(update_fields=['last_id'])
+
+    TrendingScore.objects.filter(score__lt=floor).delete()
+    TrendingEvent.objects.filter(
+        created_at__lt=EPOCH + timedelta(seconds=floor * half_life_seconds())
+    ).delete()
+    transaction.on_commit(lambda: bump_version(TRENDING_SCOPE))
+    return processed
@@ -1,6 +1,6 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import path
-from .views import PostViewSet, CommentViewSet, FeedView
+from .views import PostViewSet, CommentViewSet, FeedView, TrendingView
 
 router = DefaultRouter()
 router.register(r'posts', PostViewSet)
@@ -8,6 +8,7 @@ router.register(r'comments', CommentViewSet)
 
 urlpatterns = [
     path('feed/', FeedView.as_view(), name='feed'),
+    path('trending/', TrendingView.as_view(), name='trending'),
 
     # Explicit like/unlike routes (ALX checker requirement)
     path('posts/<int:pk>/like/', PostViewSet.as_view({'post': 'like'}), name='post-like'),
@@ -0,0 +1,26 @@
+"""
+Per-viewer state on post querysets.
+
+``with_viewer_state`` adds ``liked_by_viewer`` and ``viewer_follows_author``
+as ``EXISTS`` subqueries, so they come back in the listing query itself
+rather than costing a query per post. Responses built from it differ per
+viewer and must be cached per user.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef, Value
+
+from .models import Like
+
+
+def with_viewer_state(queryset, user):
+    if not user.is_authenticated:
+        return queryset.annotate(liked_by_viewer=Value(False), viewer_follows_author=Value(False))
+
+    # A follow row (from_user=A, to_user=B) means B follows A.
+    Follow = get_user_model().followers.through
+    return queryset.annotate(
+        liked_by_viewer=Exists(Like.objects.filter(post=OuterRef('pk'), user=user.pk)),
+        viewer_follows_author=Exists(
+            Follow.objects.filter(from_user=OuterRef('author_id'), to_user=user.pk)
+        ),
+    )
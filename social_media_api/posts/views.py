@@ -2,65 +2,235 @@ from rest_framework import viewsets, permissions, generics
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter
-from .models import Post, Comment, Like
-from .serializers import PostSerializer, CommentSerializer
-from rest_framework.views import APIView
+from .models import Post, Comment
+from .feed import fan_out_post, feed_keys
+from .serializers import PostSerializer, CommentSerializer, LikedLookupSerializer
 from .permissions import IsOwnerOrReadOnly
 from rest_framework.response import Response
-from notifications.models import Notification
+from notifications.dispatch import notify
+from social_media_api.pagination import CreatedAtCursorPagination
+from social_media_api.querysets import SerializerPrefetchMixin, optimize_for_serializer
 from rest_framework.decorators import action
-
-class PostViewSet(viewsets.ModelViewSet):
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from .cache import POSTS_SCOPE, embedded_post_scopes, following_scope, invalidate_post, post_scope
+from social_media_api.cache import CachedResponseMixin
+from social_media_api.metrics import MetricsMixin
+from rest_framework import status
+from rest_framework.parsers import JSONParser
+from .parsers import NDJSONParser
+from .search import search_post_ids
+from .trending import TRENDING_SCOPE, trending_size
+from .viewer import with_viewer_state
+from social_media_api.pagination import KeysetPagination, RankedPagination
+from rest_framework.exceptions import NotFound, ValidationError
+from .likes import like_post, liked_post_ids, unlike_post
+
+User = get_user_model()
+
+
+def _post_id(pk):
+    """
+    ``pk`` is an int from the explicit like/unlike routes but any string from
+    the router's; the raw like SQL needs a valid id either way.
+    """
+    pk = str(pk)
+    if not (pk.isascii() and pk.isdigit()) or not 0 < int(pk) < 2 ** 63:
+        raise NotFound()
+    return int(pk)
+
+
+class PostViewSet(MetricsMixin, CachedResponseMixin, SerializerPrefetchMixin, viewsets.ModelViewSet):
     queryset = Post.objects.all()
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
+    cache_per_user = True
 
-    def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+    def get_queryset(self):
+        posts = super().get_queryset()
+        return with_viewer_state(posts, self.request.user)
 
-    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
-    def like(self, request, pk=None):
+    def get_cache_scopes(self, request, *args, **kwargs):
+        # viewer_follows_author changes when the viewer follows or unfollows.
+        if 'pk' in kwargs:
+            return [post_scope(kwargs['pk']), following_scope(request.user.pk)]
+        return [POSTS_SCOPE, following_scope(request.user.pk)]
+
+    def get_dependent_scopes(self, data):
+        # A detail response already depends on its own post scope.
+        return embedded_post_scopes(data) if self.action == 'list' else []
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        post = serializer.save(author=self.request.user)
+        User.objects.filter(pk=post.author_id).update(
+            post_count=F('post_count') + 1
+        )
+        fan_out_post(post)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        author_id = instance.author_id
+        instance.delete()
+        User.objects.filter(pk=author_id).update(
+            post_count=F('post_count') - 1
+        )
+
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """Create many posts from a JSON array or an NDJSON body, all or nothing."""
+        serializer = self.get_serializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=getattr(settings, 'POSTS_BULK_MAX_ITEMS', 1000),
+        )
+        serializer.is_valid(raise_exception=True)
+        posts = serializer.save(author=request.user)
+        return Response(
+            {"created": len(posts), "ids": [post.id for post in posts]},
+            status=status.HTTP_201_CREATED
+        )
+
+    @action(detail=False, methods=['get'], pagination_class=RankedPagination)
+    def search(self, request):
+        """Ranked full-text search: ``?q=words``, with ``word*`` for prefixes."""
+        query = request.query_params.get('q', '')
+        if not query.strip():
+            raise ValidationError({"q": "This query parameter is required."})
+
+        page_ids = self.paginate_queryset(search_post_ids(query))
+        posts = self.get_queryset().in_bulk(page_ids)
+        serializer = self.get_serializer(
+            [posts[post_id] for post_id in page_ids if post_id in posts], many=True
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def comments(self, request, pk=None):
         post = generics.get_object_or_404(Post, pk=pk)
 
-        like, created = Like.objects.get_or_create(user=request.user, post=post)
+        comments = optimize_for_serializer(Comment.objects.filter(post=post), CommentSerializer)
+        page = self.paginate_queryset(comments)
+        serializer = CommentSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
 
-        if not created:
-            return Response({"message": "You already liked this post."})
+    @transaction.atomic
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def like(self, request, pk=None):
+        result = like_post(request.user.pk, _post_id(pk))
+        if result is None:
+            raise NotFound()
 
-        if post.author != request.user:
-            Notification.objects.create(
-                recipient=post.author,
-                actor=request.user,
-                verb="liked your post",
-                target=post.title
-            )
+        if result.changed:
+            transaction.on_commit(lambda: invalidate_post(result.post.pk))
+            notify(result.post.author_id, request.user, "liked your post", target=result.post)
 
-        return Response({"message": "Post liked successfully."})
+        message = "Post liked successfully." if result.changed else "You already liked this post."
+        return self.like_response(result, message)
 
+    @transaction.atomic
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def unlike(self, request, pk=None):
-        post = generics.get_object_or_404(Post, pk=pk)
+        result = unlike_post(request.user.pk, _post_id(pk))
+        if result is None:
+            raise NotFound()
+
+        if result.changed:
+            transaction.on_commit(lambda: invalidate_post(result.post.pk))
+
+        return self.like_response(result, "Post unliked successfully.")
 
-        Like.objects.filter(user=request.user, post=post).delete()
+    def like_response(self, result, message):
+        return Response({
+            "message": message,
+            "liked": result.liked,
+            "like_count": result.post.like_count,
+        })
 
-        return Response({"message": "Post unliked successfully."})
+    @action(detail=False, methods=['get'])
+    def liked(self, request):
+        """``?ids=1,2,3`` -> which of those posts the user has liked, in one query."""
+        serializer = LikedLookupSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        post_ids = serializer.validated_data['ids']
 
+        liked = liked_post_ids(request.user, post_ids)
+        return Response({str(post_id): post_id in liked for post_id in post_ids})
 
-class CommentViewSet(viewsets.ModelViewSet):
+
+class CommentViewSet(MetricsMixin, SerializerPrefetchMixin, viewsets.ModelViewSet):
     queryset = Comment.objects.all().order_by('-created_at')
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
+    pagination_class = CreatedAtCursorPagination
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
-
-class FeedView(APIView):
+        comment = serializer.save(author=self.request.user)
+        Post.objects.filter(pk=comment.post_id).update(comment_count=F('comment_count') + 1)
+
+        notify(
+            comment.post.author_id,
+            self.request.user,
+            "commented on your post",
+            target=comment.post
+        )
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        post_id = instance.post_id
+        instance.delete()
+        Post.objects.filter(pk=post_id).update(comment_count=F('comment_count') - 1)
+
+class FeedView(MetricsMixin, CachedResponseMixin, SerializerPrefetchMixin, generics.ListAPIView):
+    """
+    The home timeline, paged on ``FeedItem`` keys so each page is an index
+    range read; the page's posts are then loaded by primary key.
+    """
+    queryset = Post.objects.all()
+    serializer_class = PostSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    cache_per_user = True
+
+    def get_cache_scopes(self, request, *args, **kwargs):
+        return [POSTS_SCOPE, following_scope(request.user.pk)]
+
+    def get_dependent_scopes(self, data):
+        return embedded_post_scopes(data)
+
+    def get_queryset(self):
+        posts = super().get_queryset()
+        return with_viewer_state(posts, self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        keys = self.paginate_queryset(
+            lambda position, limit: feed_keys(request.user, position, limit)
+        )
+        posts = self.get_queryset().in_bulk([post_id for _, post_id in keys]) if keys else {}
+        serializer = self.get_serializer(
+            [posts[post_id] for _, post_id in keys if post_id in posts], many=True
+        )
+        return self.get_paginated_response(serializer.data)
+
+class TrendingView(MetricsMixin, CachedResponseMixin, SerializerPrefetchMixin, generics.ListAPIView):
+    """The top posts by decayed engagement, read straight off the score index."""
+    queryset = Post.objects.filter(trending__isnull=False).order_by('-trending__score')
+    serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+    cache_per_user = True
 
-    def get(self, request):
-        following_users = request.user.following.all()
+    def get_cache_scopes(self, request, *args, **kwargs):
+        return [POSTS_SCOPE, TRENDING_SCOPE, following_scope(request.user.pk)]
 
-        posts = Post.objects.filter(author__in=following_users).order_by('-created_at')
+    def get_dependent_scopes(self, data):
+        return embedded_post_scopes(data)
 
-        serializer = PostSerializer(posts, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+    def get_queryset(self):
+        posts = super().get_queryset()
+        return with_viewer_state(posts, self.request.user)[:trending_size()]
@@ -0,0 +1,131 @@
+"""
+Versioned response caching for read-heavy API views.
+
+Each cached response is stored under a key that embeds the current version
+of every scope it depends on (e.g. ``posts`` for any post listing, ``post:7``
+for one post). Writers never delete cached responses; they bump the scope
+version, which makes every key built from the old version unreachable.
+
+A listing also depends on the items it happens to contain, which are only
+known once it is built. ``get_dependent_scopes`` names their scopes (e.g.
+``post:7`` for each post on a page); their versions are stored with the
+cached data and compared on every hit, so a like on one post expires only
+the pages showing it. The ETag covers both sets of versions, and a client
+presenting a matching ``If-None-Match`` gets a 304 without any query or
+serialization.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_PREFIX = 'cache-version'
+
+
+def _version_key(scope):
+    return f'{VERSION_PREFIX}:{scope}'
+
+
+def get_versions(scopes):
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        # Seed from the clock so an evicted version never reuses an old value.
+        for key, value in missing.items():
+            cache.add(key, value, timeout=None)
+        versions.update(cache.get_many(list(missing)))
+    return [versions.get(key, missing.get(key)) for key in keys]
+
+
+def bump_version(*scopes):
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def etag_matches(header, etag):
+    """Weak comparison of ``etag`` against an ``If-None-Match`` header value."""
+    if not header:
+        return False
+    candidates = parse_etags(header)
+    if candidates == ['*']:
+        return True
+    etag = etag.removeprefix('W/')
+    return any(candidate.removeprefix('W/') == etag for candidate in candidates)
+
+
+class CachedResponseMixin:
+    """
+    Cache ``list``/``retrieve`` responses under versioned keys with ETags.
+
+    Views declare what a response depends on by overriding
+    ``get_cache_scopes``; ``cache_per_user`` adds the requesting user to the
+    key for responses that differ between viewers.
+    """
+    cache_per_user = False
+
+    def get_cache_scopes(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+    def get_cache_timeout(self):
+        return getattr(settings, 'API_CACHE_TIMEOUT', 300)
+
+    def get_dependent_scopes(self, data):
+        """Scopes of the items embedded in a freshly built response's ``data``."""
+        return []
+
+    def get_response_cache_key(self, request, *args, **kwargs):
+        scopes = self.get_cache_scopes(request, *args, **kwargs)
+        parts = [
+            f'{scope}={version}'
+            for scope, version in zip(scopes, get_versions(scopes))
+        ]
+        if self.cache_per_user:
+            parts.append(f'user={request.user.pk}')
+        parts.append(request.get_full_path())
+        parts.append(request.accepted_media_type or '')
+        digest = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+        return f'response:{type(self).__name__}:{digest}'
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_response_cache_key(request, *args, **kwargs)
+
+        entry = cache.get(key)
+        if entry is not None:
+            data, dependencies = entry
+            if get_versions(list(dependencies)) != list(dependencies.values()):
+                entry = None
+
+        if entry is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            # Read after building, so a write committing in between can leave
+            # this entry stale until it times out.
+            scopes = self.get_dependent_scopes(response.data)
+            dependencies = dict(zip(scopes, get_versions(scopes)))
+            cache.set(key, (response.data, dependencies), timeout=self.get_cache_timeout())
+        else:
+            response = Response(data)
+
+        versions = '|'.join(f'{scope}={version}' for scope, version in dependencies.items())
+        etag = f'"{hashlib.sha1(f"{key}|{versions}".encode()).hexdigest()}"'
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
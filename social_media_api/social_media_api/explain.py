@@ -0,0 +1,77 @@
+"""
+Query-plan checks for the queries behind the hot endpoints.
+
+Each app lists the querysets its busiest code paths run in a
+``hot_queries`` module, registered with ``@hot_query``. Each function
+returns a queryset shaped like the real one, with placeholder ids.
+``explain_hot_queries`` runs ``EXPLAIN`` (``EXPLAIN QUERY PLAN`` on
+SQLite) for each of them and reports any step that reads a whole table
+instead of going through an index. A missing index then shows up here
+rather than as a slow page once the table has grown.
+"""
+import re
+
+from django.db import connections
+from django.utils.module_loading import autodiscover_modules
+
+_registry = {}
+
+# SQLite: "SCAN posts_post" is a full table scan; "SCAN posts_post USING
+# INDEX ..." walks an index in order and "SEARCH ..." is an index lookup.
+# Scans of subqueries (CO-ROUTINE/MATERIALIZE steps) read rows already
+# produced by an earlier step.
+_SQLITE_SCAN = re.compile(r'\bSCAN (?P<table>\w+)(?P<rest>.*)$')
+_SQLITE_SUBQUERY = re.compile(r'\b(?:CO-ROUTINE|MATERIALIZE) (?P<name>\w+)')
+_POSTGRES_SCAN = re.compile(r'\bSeq Scan on (?P<table>\w+)')
+_SORTS = ('USE TEMP B-TREE', 'Sort Key:')
+
+
+def hot_query(name):
+    """Register a zero-argument function returning the queryset to explain."""
+    def decorator(function):
+        _registry[name] = function
+        return function
+    return decorator
+
+
+def hot_queries():
+    """``{name: function}`` for every registered hot query, sorted by name."""
+    autodiscover_modules('hot_queries')
+    return dict(sorted(_registry.items()))
+
+
+def full_scans(plan, vendor):
+    """Names of the tables ``plan`` reads in full."""
+    tables = []
+    subqueries = {'CONSTANT'} | {match['name'] for match in _SQLITE_SUBQUERY.finditer(plan)}
+    for line in plan.splitlines():
+        if vendor == 'postgresql':
+            match = _POSTGRES_SCAN.search(line)
+            if match:
+                tables.append(match['table'])
+        elif vendor == 'sqlite':
+            match = _SQLITE_SCAN.search(line)
+            if match and 'INDEX' not in match['rest'] and match['table'] not in subqueries:
+                tables.append(match['table'])
+    return tables
+
+
+def sorts(plan):
+    """Whether ``plan`` sorts rows itself rather than reading them in index order."""
+    return any(marker in plan for marker in _SORTS)
+
+
+def explain(queryset):
+    """
+    ``(plan, full_scans)`` for a queryset on its own database.
+
+    ``QuerySet.explain()`` puts the prefix on the inner query of a filtered
+    window annotation, so the prefix is added to the compiled SQL here.
+    """
+    connection = connections[queryset.db]
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+        # SQLite rows are (id, parent, notused, detail); PostgreSQL's hold one line each.
+        plan = '\n'.join(row[-1] for row in cursor.fetchall())
+    return plan, full_scans(plan, connection.vendor)
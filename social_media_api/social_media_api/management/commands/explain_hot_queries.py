@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from social_media_api.explain import explain, hot_queries, sorts
+
+
+class Command(BaseCommand):
+    help = (
+        "Print the query plan of every registered hot query and flag full table scans. "
+        "Plans depend on table statistics, so run it against a database with realistic data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help="Only explain these queries.")
+        parser.add_argument('--fail-on-scan', action='store_true',
+                            help="Exit non-zero if any query scans a whole table.")
+
+    def handle(self, *args, **options):
+        queries = hot_queries()
+        unknown = set(options['names']) - set(queries)
+        if unknown:
+            raise CommandError(f"Unknown hot queries: {', '.join(sorted(unknown))}.")
+
+        flagged = []
+        for name, make_queryset in queries.items():
+            if options['names'] and name not in options['names']:
+                continue
+            plan, scans = explain(make_queryset())
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(plan)
+            if scans:
+                flagged.append(name)
+                self.stdout.write(self.style.WARNING(f"Full scan of {', '.join(scans)}"))
+            elif sorts(plan):
+                self.stdout.write(self.style.NOTICE("Sorts rows instead of reading them in index order"))
+            self.stdout.write('')
+
+        if not flagged:
+            self.stdout.write(self.style.SUCCESS("No full table scans."))
+        elif options['fail_on_scan']:
+            raise CommandError(f"Full table scans in: {', '.join(flagged)}.")
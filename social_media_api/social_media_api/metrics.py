@@ -0,0 +1,244 @@
+"""
+Per-view request metrics in Prometheus text format.
+
+``MetricsMiddleware`` times every request and, through
+``connection.execute_wrapper``, counts its SQL queries and the time spent
+in them. Views that include ``MetricsMixin`` also report how long their
+serializers took to build response data. Lazy queries issued while
+serializing (an N+1) count toward both DB and serialization time. Each
+value lands in a histogram labelled with the view name and HTTP method.
+``/api/metrics/`` renders the histograms and any registered gauges.
+
+With ``METRICS_SERVER_TIMING`` the same numbers are sent back in a
+``Server-Timing`` header, which browser dev tools display per request.
+
+Under ASGI the middleware runs on the event loop while sync views run on
+a worker thread, so there the wrapper is installed by ``MetricsMixin``
+instead and only views using it report queries.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Thread-safe histograms keyed by metric name and label values."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._gauges = {}
+
+    def describe(self, name, help_text, buckets):
+        self._metrics.setdefault(name, (help_text, buckets, {}))
+
+    def observe(self, name, value, **labels):
+        help_text, buckets, series = self._metrics[name]
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def gauge(self, name, help_text, callback):
+        """Register ``callback() -> number`` to be read at every scrape."""
+        self._gauges[name] = (help_text, callback)
+
+    def clear(self):
+        with self._lock:
+            for _, _, series in self._metrics.values():
+                series.clear()
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, (help_text, buckets, series) in sorted(self._metrics.items()):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for key, histogram in sorted(series.items()):
+                    labels = ','.join(f'{label}="{_escape(value)}"' for label, value in key)
+                    cumulative = 0
+                    for bound, count in zip(buckets + ('+Inf',), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.sum}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+        for name, (help_text, callback) in sorted(self._gauges.items()):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {callback()}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+registry.describe('http_request_duration_seconds', "Total request latency.", LATENCY_BUCKETS)
+registry.describe('http_request_db_queries', "SQL queries per request.", QUERY_BUCKETS)
+registry.describe('http_request_db_seconds', "Time spent in SQL per request.", LATENCY_BUCKETS)
+registry.describe(
+    'http_request_serialization_seconds', "Time spent building serializer data.", LATENCY_BUCKETS
+)
+
+
+class RequestMetrics:
+    """Collects one request's numbers; also the ``execute_wrapper`` callable."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialization_time = None
+        self.instrumented = False
+
+    @contextmanager
+    def instrument(self):
+        """Count queries on this thread's connections while the block runs."""
+        self.instrumented = True
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(self))
+                yield
+        finally:
+            self.instrumented = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def add_serialization(self, seconds):
+        self.serialization_time = (self.serialization_time or 0.0) + seconds
+
+    def record(self, request, response):
+        total = time.perf_counter() - self.started
+        match = request.resolver_match
+        labels = {
+            'view': match.view_name if match else 'unmatched',
+            'method': request.method,
+        }
+        registry.observe('http_request_duration_seconds', total, **labels)
+        registry.observe('http_request_db_queries', self.queries, **labels)
+        registry.observe('http_request_db_seconds', self.db_time, **labels)
+        if self.serialization_time is not None:
+            registry.observe('http_request_serialization_seconds', self.serialization_time, **labels)
+
+        if getattr(settings, 'METRICS_SERVER_TIMING', False):
+            timings = [
+                f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+                f'total;dur={total * 1000:.1f}',
+            ]
+            if self.serialization_time is not None:
+                timings.insert(1, f'serialize;dur={self.serialization_time * 1000:.1f}')
+            response['Server-Timing'] = ', '.join(timings)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with metrics.instrument():
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        metrics.record(request, response)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        metrics.record(request, response)
+        return response
+
+
+class MetricsMixin:
+    """Reports time spent turning instances into response data."""
+
+    def dispatch(self, request, *args, **kwargs):
+        metrics = _current.get()
+        if metrics is None or metrics.instrumented:
+            return super().dispatch(request, *args, **kwargs)
+        with metrics.instrument():
+            return super().dispatch(request, *args, **kwargs)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        metrics = _current.get()
+        if metrics is not None:
+            to_representation = serializer.to_representation
+
+            def timed(instance):
+                started = time.perf_counter()
+                try:
+                    return to_representation(instance)
+                finally:
+                    metrics.add_serialization(time.perf_counter() - started)
+
+            serializer.to_representation = timed
+        return serializer
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Requires ``Authorization: Bearer
+    <METRICS_TOKEN>`` when a token is configured and is only served in
+    DEBUG otherwise.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        if request.headers.get('Authorization') != f'Bearer {token}':
+            raise Http404
+    elif not settings.DEBUG:
+        raise Http404
+
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4')
@@ -0,0 +1,74 @@
+from base64 import b64decode, b64encode
+from datetime import datetime
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (created_at, id).
+
+    The cursor is an opaque token holding the last seen position, so every
+    page is a range read on the matching index instead of an OFFSET scan,
+    and no COUNT(*) query is issued.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class TimestampCursorPagination(CreatedAtCursorPagination):
+    ordering = ('-timestamp', '-id')
+
+
+class KeysetPagination(CreatedAtCursorPagination):
+    """
+    Forward-only keyset pagination for timelines merged from more than one
+    source, where no single queryset can be handed to ``CursorPagination``.
+
+    ``paginate_queryset`` takes ``fetch(position, limit)`` instead of a
+    queryset. It must return up to ``limit`` ``(created_at, id)`` keys older
+    than ``position`` (None on the first page), newest first. The cursor is
+    the last key of the page.
+    """
+
+    def paginate_queryset(self, fetch, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        keys = list(fetch(self.decode_position(request), page_size + 1))
+        self.next_position = keys[page_size - 1] if len(keys) > page_size else None
+        return keys[:page_size]
+
+    def decode_position(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            created_at, _, key = b64decode(encoded.encode('ascii')).decode('ascii').partition('|')
+            return datetime.fromisoformat(created_at), int(key)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        created_at, key = self.next_position
+        encoded = b64encode(f'{created_at.isoformat()}|{key}'.encode('ascii')).decode('ascii')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    def get_previous_link(self):
+        return None
+
+
+class RankedPagination(PageNumberPagination):
+    """
+    Page numbers over an already ranked, bounded list such as search hits.
+
+    Relevance order has no stable key to build a cursor from, and the list
+    is capped, so plain slicing is cheap.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,102 @@
+"""
+Derive select_related/prefetch_related calls from a serializer's fields.
+
+Serializers that read ``author.username`` or nest ``CommentSerializer(many=True)``
+issue one query per row unless the queryset joins or prefetches those
+relations up front. ``optimize_for_serializer`` walks the declared fields and
+adds the joins, so a new nested field does not silently become an N+1.
+
+A nested ``many=True`` field that is not a plain relation (e.g. a bounded
+preview filled through ``Prefetch(to_attr=...)``) declares a ``prefetch``
+callable on its ``ListSerializer`` returning that ``Prefetch``. It is called
+per queryset, so prefetches that read settings stay current.
+"""
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def _relation_path(model, source_attrs):
+    """Longest prefix of ``source_attrs`` that follows forward FK/one-to-one fields."""
+    path = []
+    for attr in source_attrs:
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        if not (field.many_to_one or field.one_to_one) or field.related_model is None:
+            break
+        path.append(attr)
+        model = field.related_model
+    return path, model
+
+
+@lru_cache(maxsize=None)
+def get_related_lookups(serializer_class):
+    """Return ``(select_related, prefetch_related)`` lookups needed by a ModelSerializer."""
+    model = serializer_class.Meta.model
+    select_related = set()
+    prefetch_related = []
+
+    for field in serializer_class().fields.values():
+        if field.write_only or field.source == '*':
+            continue
+
+        if isinstance(field, serializers.ListSerializer):
+            prefetch = getattr(field, 'prefetch', None)
+            if prefetch is not None:
+                prefetch_related.append(prefetch)
+                continue
+            child = field.child
+            try:
+                model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                # Not a model relation (e.g. a to_attr filled by the view).
+                continue
+            if isinstance(child, serializers.ModelSerializer):
+                queryset = optimize_for_serializer(
+                    child.Meta.model._default_manager.all(), type(child)
+                )
+                prefetch_related.append(Prefetch(field.source, queryset=queryset))
+            else:
+                prefetch_related.append(field.source)
+            continue
+
+        if isinstance(field, serializers.ManyRelatedField):
+            prefetch_related.append(field.source)
+            continue
+
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            # Reads the local ``<name>_id`` column, no join needed.
+            continue
+
+        path, related_model = _relation_path(model, field.source_attrs)
+        if not path:
+            continue
+        select_related.add('__'.join(path))
+
+        if isinstance(field, serializers.ModelSerializer) and related_model is field.Meta.model:
+            nested_select, _ = get_related_lookups(type(field))
+            select_related.update(f"{'__'.join(path)}__{lookup}" for lookup in nested_select)
+
+    return tuple(sorted(select_related)), tuple(prefetch_related)
+
+
+def optimize_for_serializer(queryset, serializer_class):
+    select_related, prefetch_related = get_related_lookups(serializer_class)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(
+            *(lookup() if callable(lookup) else lookup for lookup in prefetch_related)
+        )
+    return queryset
+
+
+class SerializerPrefetchMixin:
+    """Apply ``optimize_for_serializer`` to a generic view's queryset."""
+
+    def get_queryset(self):
+        return optimize_for_serializer(super().get_queryset(), self.get_serializer_class())
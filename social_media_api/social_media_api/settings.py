@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -39,13 +40,16 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework.authtoken',
+    'social_media_api',
     'accounts',
     'posts',
     'django_filters',
     'notifications',
+    'benchmarks',
 ]
 
 MIDDLEWARE = [
+    'social_media_api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -87,6 +91,58 @@ DATABASES = {
 }
 
 
+# Cache
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at e.g.
+# django.core.cache.backends.filebased.FileBasedCache or
+# django.core.cache.backends.redis.RedisCache to share it between processes.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'social-media-api'),
+    }
+}
+
+# Seconds a cached API response is kept; versioned keys expire it earlier
+# whenever the underlying rows change.
+
+API_CACHE_TIMEOUT = 300
+
+
+# Notifications
+# Views enqueue notification events that a background thread writes in
+# batches. Set NOTIFICATIONS_ASYNC = False to write them inline instead.
+
+NOTIFICATIONS_ASYNC = True
+NOTIFICATIONS_BATCH_SIZE = 100
+NOTIFICATIONS_FLUSH_INTERVAL = 0.5  # seconds to wait for a batch to fill
+NOTIFICATIONS_QUEUE_SIZE = 10000
+NOTIFICATIONS_RECENT_ACTORS = 3  # actor names kept on an aggregated notification
+# Seconds a cached unread count is served before it is recounted, so a
+# count that drifted (e.g. in another process's cache) heals.
+NOTIFICATIONS_UNREAD_COUNT_TTL = 60
+
+# Live notification streams (notifications/stream/, served under ASGI).
+
+NOTIFICATIONS_STREAM_HEARTBEAT = 15  # seconds between keep-alive comments
+NOTIFICATIONS_STREAM_BUFFER = 100  # pending events per client before dropping
+# Django does not notice a client going away mid-stream, so each stream ends
+# after this many seconds and EventSource reconnects after the retry delay.
+NOTIFICATIONS_STREAM_MAX_AGE = 300
+NOTIFICATIONS_STREAM_RETRY = 5000  # milliseconds
+
+
+# Follow graph
+# Seconds a user's cached following/follower id arrays are kept; follow
+# changes drop them immediately.
+
+GRAPH_CACHE_TIMEOUT = 3600
+
+# Seconds "people you may know" results are cached per user.
+
+SUGGESTIONS_CACHE_TIMEOUT = 600
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -106,6 +162,26 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# Hashing runs in a bounded pool (accounts.security). Changing the first
+# hasher or PASSWORD_HASH_ITERATIONS upgrades stored hashes on next login.
+
+AUTHENTICATION_BACKENDS = ['accounts.security.PooledModelBackend']
+
+PASSWORD_HASHERS = [
+    'accounts.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', 600000))
+PASSWORD_HASH_WORKERS = 4  # hashes computed concurrently
+PASSWORD_HASH_QUEUE = 16  # requests allowed to wait for a hashing slot
+PASSWORD_HASH_WAIT = 2  # seconds to wait for a slot before answering 503
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -123,6 +199,9 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -134,11 +213,76 @@ AUTH_USER_MODEL = 'accounts.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
-}
\ No newline at end of file
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '20/min',
+        'login_username': '5/min',
+        'register_ip': '10/hour',
+    },
+}
+
+# Feed fan-out
+# Authors with more followers than this are merged into feeds at read time
+# instead of being pushed to every follower when they post.
+
+FEED_FANOUT_FOLLOWER_LIMIT = 5000
+
+# How many of an author's recent posts are copied into a new follower's feed.
+
+FEED_BACKFILL_LIMIT = 200
+
+# Number of latest comments embedded in each post of a listing.
+
+COMMENT_PREVIEW_SIZE = 3
+
+# Bulk post creation: the most items and NDJSON bytes one request may
+# carry, and how many rows go into each INSERT.
+
+POSTS_BULK_MAX_ITEMS = 1000
+POSTS_BULK_MAX_BYTES = 1024 * 1024
+POSTS_BULK_CHUNK_SIZE = 500
+
+# Full-text search returns at most this many ranked hits.
+
+POSTS_SEARCH_MAX_RESULTS = 1000
+
+# Trending: engagement loses half its weight every TRENDING_HALF_LIFE_HOURS;
+# scores are refreshed by `manage.py update_trending` and the top
+# TRENDING_SIZE posts are served.
+
+TRENDING_HALF_LIFE_HOURS = 12
+TRENDING_LIKE_WEIGHT = 1.0
+TRENDING_COMMENT_WEIGHT = 2.0
+TRENDING_PRUNE_HALVINGS = 20
+# Rows created this recently may still be joined by lower ids from slower
+# transactions, so they are re-scanned on the next run.
+TRENDING_COMMIT_LAG_SECONDS = 300
+TRENDING_SIZE = 50
+
+# Profile pictures: uploads are capped at AVATAR_MAX_UPLOAD_SIZE bytes and
+# rendered into square thumbnails of AVATAR_SIZES px by a pool of
+# AVATAR_WORKERS threads.
+
+AVATAR_SIZES = (48, 96, 256)
+AVATAR_WORKERS = 2
+AVATAR_THUMBNAILS_ASYNC = True
+AVATAR_MAX_UPLOAD_SIZE = 5 * 1024 * 1024
+
+# Request metrics: /api/metrics/ needs `Authorization: Bearer <METRICS_TOKEN>`
+# (or DEBUG when no token is set); Server-Timing headers expose per-request
+# DB and serialization time to the client.
+
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+METRICS_SERVER_TIMING = DEBUG
+
+# Token lookups are cached in-process; entries expire after this many
+# seconds so changes made by other processes are eventually seen.
+
+AUTH_TOKEN_CACHE_TTL = 60
+AUTH_TOKEN_CACHE_SIZE = 10000
@@ -0,0 +1,148 @@
+"""
+Test helpers shared by the social API apps.
+"""
+import itertools
+import time
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+User = get_user_model()
+
+DUMMY_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(
+    CACHES=DUMMY_CACHE,
+    NOTIFICATIONS_ASYNC=False,
+    AVATAR_THUMBNAILS_ASYNC=False,
+    AUTH_TOKEN_CACHE_TTL=0,
+    PASSWORD_HASH_ITERATIONS=1000,
+)
+class SocialAPITestCase(APITestCase):
+    """
+    Shared helpers for the social API tests. Response and token caching are
+    off unless a test case opts back in, notifications and avatar
+    thumbnails are written inline once the request's on_commit callbacks
+    run, and password hashing is cheap.
+    """
+
+    def make_user(self, username):
+        user = User.objects.create_user(username=username, password="testpassword")
+        Token.objects.create(user=user)
+        return user
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {user.auth_token.key}")
+
+
+_seed_ids = itertools.count()
+
+
+def seed_fanout(viewer, scale):
+    """
+    Add fan-out data around ``viewer`` that grows with ``scale``.
+
+    ``scale`` authors follow and are followed by the viewer. Each author
+    writes ``scale`` posts, and every author comments on and likes every
+    post. The viewer gets ``scale`` posts of their own with a comment and a
+    notification each. Counters and feeds are filled in the way the API
+    would fill them.
+    """
+    from django.contrib.contenttypes.models import ContentType
+
+    from accounts.follows import follow
+    from notifications.dispatch import NotificationEvent, write_notifications
+    from posts.bulk import bulk_create_posts
+    from posts.counters import reconcile_post_counters
+    from posts.models import Comment, Like, Post
+
+    batch = next(_seed_ids)
+    authors = User.objects.bulk_create(
+        User(username=f"seed{batch}-author{number}") for number in range(scale)
+    )
+    for author in authors:
+        follow(viewer, author)
+        follow(author, viewer)
+
+    posts = bulk_create_posts(
+        {'author': author, 'title': f"Seeded {batch}-{number}", 'content': "Seeded content"}
+        for author in authors + [viewer]
+        for number in range(scale)
+    )
+    Comment.objects.bulk_create(
+        Comment(post=post, author=author, content="Seeded comment")
+        for post in posts for author in authors + [viewer]
+    )
+    Like.objects.bulk_create(
+        Like(user=author, post=post) for post in posts for author in authors
+    )
+    reconcile_post_counters()
+
+    own_posts = [post for post in posts if post.author_id == viewer.pk]
+    write_notifications([
+        NotificationEvent(
+            recipient_id=viewer.pk,
+            actor_id=author.pk,
+            actor_username=author.username,
+            verb="liked your post",
+            target=post.title,
+            target_type_id=ContentType.objects.get_for_model(post).pk,
+            target_id=post.pk,
+        )
+        for post, author in zip(own_posts, authors)
+    ])
+
+    return SimpleNamespace(
+        authors=authors,
+        posts=list(Post.objects.filter(pk__in=[post.pk for post in posts])),
+        own_posts=own_posts,
+        own_comments=list(Comment.objects.filter(post__in=posts, author=viewer)),
+    )
+
+
+class QueryBudgetTestCase(SocialAPITestCase):
+    """
+    Checks that endpoints cost a fixed number of queries however much data
+    they touch.
+
+    ``assertQueryBudget`` runs a request after seeding at each of
+    ``scales``, with the data accumulating between runs. The query count
+    must be the same every time, so it does not grow with result size. It
+    must also stay within the budget, and every request must finish within
+    ``max_seconds``. ``prepare(seeded)`` runs uncounted before each request.
+    """
+    scales = (2, 6)
+    max_seconds = 2.0
+
+    def setUp(self):
+        self.viewer = self.make_user("viewer")
+
+    def assertQueryBudget(self, budget, make_request, prepare=None):
+        counts = []
+        for scale in self.scales:
+            seeded = seed_fanout(self.viewer, scale)
+            if prepare is not None:
+                prepare(seeded)
+            self.authenticate(self.viewer)
+
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = make_request(seeded)
+                elapsed = time.perf_counter() - started
+
+            self.assertLess(response.status_code, 300, getattr(response, 'data', response))
+            self.assertLessEqual(elapsed, self.max_seconds)
+            counts.append(len(queries))
+
+        self.assertEqual(
+            len(set(counts)), 1,
+            f"Query count grows with data: {counts} at scales {self.scales}"
+        )
+        self.assertLessEqual(counts[0], budget, f"{counts[0]} queries, budget is {budget}")
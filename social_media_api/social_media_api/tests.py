@@ -0,0 +1,44 @@
+import io
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from .explain import explain, full_scans, hot_queries, sorts
+
+
+class HotQueryPlanTestCase(TestCase):
+    """
+    Tests that the registered hot queries are served from indexes.
+    """
+
+    def test_full_scans_are_detected(self):
+        self.assertEqual(full_scans("SCAN posts_post\nSEARCH accounts_user USING INDEX x", "sqlite"),
+                         ["posts_post"])
+        self.assertEqual(full_scans("SCAN posts_post USING INDEX post_created_id_idx", "sqlite"), [])
+        self.assertEqual(full_scans("CO-ROUTINE qualify\nSCAN qualify", "sqlite"), [])
+        self.assertEqual(full_scans("  ->  Seq Scan on posts_like  (cost=0.00..1.01)", "postgresql"),
+                         ["posts_like"])
+
+    def test_no_hot_query_scans_a_table(self):
+        for name, make_queryset in hot_queries().items():
+            with self.subTest(name):
+                plan, scans = explain(make_queryset())
+                self.assertEqual(scans, [], plan)
+
+    def test_feed_page_reads_in_index_order(self):
+        plan, _ = explain(hot_queries()["posts.feed_page"]())
+        self.assertFalse(sorts(plan), plan)
+
+    def test_command_prints_plans(self):
+        out = io.StringIO()
+        call_command("explain_hot_queries", "posts.feed_page", stdout=out)
+        self.assertIn("posts_feeditem", out.getvalue())
+        self.assertIn("No full table scans.", out.getvalue())
+
+    def test_command_fails_on_scan(self):
+        with mock.patch("social_media_api.management.commands.explain_hot_queries.explain",
+                        return_value=("SCAN posts_post", ["posts_post"])):
+            with self.assertRaises(CommandError):
+                call_command("explain_hot_queries", "posts.list_page", "--fail-on-scan",
+                             stdout=io.StringIO())